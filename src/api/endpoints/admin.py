@@ -1,13 +1,14 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_async_db
-from src.models import User
-from src.schemas.user import UserResponse, UserSuperuserUpdate
+from src.schemas.user import UserResponse, UserSnapshot, UserSuperuserUpdate
 from src.services import user_service
 from src.services.auth import get_current_user
+from src.services.metrics import collect_metrics
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -16,7 +17,7 @@ async def make_superuser(
     update_data: UserSuperuserUpdate,
     user_uid: UUID,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     return await user_service.make_superuser(
         db=db,
@@ -29,10 +30,26 @@ async def make_superuser(
 async def admin_delete_user(
     user_uid: UUID,
     db: AsyncSession = Depends(get_async_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserSnapshot = Depends(get_current_user),
 ):
     return await user_service.delete_user(
         db=db,
         user_uid=user_uid,
         current_user=current_user
-    )
\ No newline at end of file
+    )
+
+@router.get("/metrics/")
+async def get_metrics(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    return await collect_metrics(db, current_user)
+
+@router.get("/users/export/")
+async def export_users(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserSnapshot = Depends(get_current_user),
+):
+    return StreamingResponse(
+        user_service.export_users(db, current_user), media_type="application/x-ndjson"
+    )
@@ -1,30 +1,207 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+import hashlib
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.conf import audio_settings, waveform_settings
 from src.database import get_async_db
-from src.models import User
-from src.schemas.audio import AudioFileCreate, AudioFileResponse
+from src.schemas.audio import (
+    AudioFileCreate,
+    AudioFileFilter,
+    AudioFilePage,
+    AudioRenditionResponse,
+    AudioFileSort,
+    SortOrder,
+    UploadCheckRequest,
+    UploadCheckResponse,
+    UploadChunkResponse,
+    UploadSessionCreate,
+    UploadSessionResponse,
+)
+from src.schemas.user import UserSnapshot
 from src.services.auth import get_current_user
 from src.services.audio import AudioService
+from src.services.audio_stream import is_not_modified, offload_file, stream_file
+from src.services.upload_limits import read_upload_file, upload_limiter, upload_slot
+from src.services.upload_session import UploadSessionService
 
 router = APIRouter(prefix="/audio", tags=["audio"])
 
-@router.post("/upload/", response_model=AudioFileCreate)
+# Тело разбирается в эндпоинте (см. read_upload_file), схема формы для
+# OpenAPI описывается вручную.
+UPLOAD_FORM_SCHEMA = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+@router.post("/upload/", response_model=AudioFileCreate, openapi_extra=UPLOAD_FORM_SCHEMA)
 async def upload_audio(
     file_name: str,
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: UserSnapshot = Depends(upload_slot),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AudioService(db)
+    async with read_upload_file(request, current_user.id, service) as file:
+        return await service.upload_audio(current_user, file_name, file)
+
+@router.post("/upload/check", response_model=UploadCheckResponse)
+async def check_upload(
+    check_data: UploadCheckRequest,
+    current_user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db),
 ):
     service = AudioService(db)
-    return await service.upload_audio(current_user, file_name, file)
+    return await service.check_upload(current_user, check_data)
 
-@router.get("/my-files/", response_model=list[AudioFileResponse])
+@router.get("/my-files/", response_model=AudioFilePage)
 async def get_my_files(
-    user: User = Depends(get_current_user),
+    cursor: Optional[str] = None,
+    limit: int = Query(audio_settings.AUDIO_LIST_DEFAULT_LIMIT, ge=1, le=audio_settings.AUDIO_LIST_MAX_LIMIT),
+    sort: AudioFileSort = AudioFileSort.id,
+    order: SortOrder = SortOrder.desc,
+    name_prefix: Optional[str] = None,
+    format: Optional[str] = None,
+    min_duration: Optional[float] = None,
+    max_duration: Optional[float] = None,
+    codec: Optional[str] = None,
+    min_bitrate: Optional[int] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AudioService(db)
+    filters = AudioFileFilter(
+        name_prefix=name_prefix,
+        format=format,
+        min_duration=min_duration,
+        max_duration=max_duration,
+        codec=codec,
+        min_bitrate=min_bitrate,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    return await service.get_user_files(
+        user, filters=filters, sort=sort, order=order, cursor=cursor, limit=limit
+    )
+
+@router.api_route("/{file_id}/stream", methods=["GET", "HEAD"])
+async def stream_audio(
+    file_id: int,
+    request: Request,
+    rendition: Optional[str] = None,
+    user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = AudioService(db)
+    audio_file = await service.get_user_file(user, file_id)
+    selected = await service.select_rendition(
+        audio_file, requested=rendition, accept=request.headers.get("accept")
+    )
+    key, media_type = audio_file.file_path, None
+    if selected is not None:
+        key, media_type = selected.storage_key, selected.media_type
+    response = (
+        offload_file(service.storage, key, audio_file.file_name, media_type)
+        or await stream_file(request, service.storage, key, audio_file.file_name, media_type)
+    )
+    if rendition is None:
+        response.headers["Vary"] = "Accept"
+    return response
+
+@router.get("/{file_id}/peaks")
+async def get_audio_peaks(
+    file_id: int,
+    request: Request,
+    resolution: int = Query(waveform_settings.PEAKS_DEFAULT_RESOLUTION, ge=1, le=100_000),
+    format: str = Query("json", pattern="^(json|binary)$"),
+    user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Пики волны: ``resolution`` пар (min, max), не больше, чем есть в файле.
+
+    Пики зависят только от содержимого и параметров расчёта, которые входят
+    в ключ файла пиков, поэтому ответ кэшируется надолго.
+    """
+    service = AudioService(db)
+    blob = await service.get_peaks_blob(user, file_id)
+    peaks_tag = hashlib.sha256(blob.peaks_key.encode()).hexdigest()[:32]
+    headers = {
+        "ETag": f'"{peaks_tag}-{resolution}-{format}"',
+        "Cache-Control": "private, max-age=31536000, immutable",
+    }
+    if is_not_modified(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    peaks = await service.get_peaks(blob, resolution)
+    if format == "binary":
+        data = peaks.pop("data")
+        headers.update({f"X-Peaks-{name.replace('_', '-').title()}": str(value) for name, value in peaks.items()})
+        return Response(content=data.tobytes(), media_type="application/octet-stream", headers=headers)
+    peaks["data"] = peaks["data"].tolist()
+    return JSONResponse(peaks, headers=headers)
+
+@router.get("/{file_id}/renditions", response_model=list[AudioRenditionResponse])
+async def get_audio_renditions(
+    file_id: int,
+    user: UserSnapshot = Depends(get_current_user),
     db: AsyncSession = Depends(get_async_db),
 ):
     service = AudioService(db)
-    return await service.get_user_files(user)
+    return await service.get_renditions(user, file_id)
+
+@router.post("/upload/sessions/", response_model=UploadSessionResponse)
+async def create_upload_session(
+    create_data: UploadSessionCreate,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = UploadSessionService(db)
+    return await service.create_session(current_user, create_data)
+
+@router.get("/upload/sessions/{session_id}", response_model=UploadSessionResponse)
+async def get_upload_session(
+    session_id: UUID,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = UploadSessionService(db)
+    return await service.get_status(current_user, session_id)
+
+@router.put("/upload/sessions/{session_id}/chunks/{index}", response_model=UploadChunkResponse)
+async def put_upload_chunk(
+    session_id: UUID,
+    index: int,
+    request: Request,
+    current_user: UserSnapshot = Depends(upload_slot),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = UploadSessionService(db)
+    body = upload_limiter.throttle(request.stream(), current_user.id)
+    return await service.put_chunk(current_user, session_id, index, body)
+
+@router.post("/upload/sessions/{session_id}/complete", response_model=AudioFileCreate)
+async def complete_upload_session(
+    session_id: UUID,
+    current_user: UserSnapshot = Depends(upload_slot),
+    db: AsyncSession = Depends(get_async_db),
+):
+    service = UploadSessionService(db)
+    return await service.complete(current_user, session_id)
 
 
 
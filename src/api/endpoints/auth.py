@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Security
-from fastapi_jwt import JwtAuthorizationCredentials
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.crud.user import crud_user
 from src.database import get_async_db
-from src.schemas.token import TokenAccessRefresh, UserLogin
-from src.services.auth import verify_password
-from src.services.security import refresh_security, access_security, ACCESS_TOKEN_COOKIE_KEY, REFRESH_TOKEN_COOKIE_KEY
+from src.schemas.token import TokenAccessRefresh, UserLogin, VerifiedToken
+from src.services.auth import (
+    get_access_token,
+    get_refresh_token,
+    verify_and_update_password,
+    verify_token,
+)
+from src.services.revocation import revocation_store
+from src.services.security import refresh_security, ACCESS_TOKEN_COOKIE_KEY, REFRESH_TOKEN_COOKIE_KEY
 from src.services.token import create_tokens, set_tokens_to_cookie
 
 from starlette.responses import JSONResponse, Response
@@ -24,7 +29,7 @@ async def login(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User {user_login.email} not found.",
         )
-    password_verified = await verify_password(
+    password_verified, new_hash = await verify_and_update_password(
         plain_password=user_login.password,
         hashed_password=found_user.hashed_password,
     )
@@ -33,22 +38,50 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User password is wrong",
         )
+    if new_hash:
+        await crud_user.update(
+            db, db_obj=found_user, update_data={"hashed_password": new_hash}
+        )
     tokens = await create_tokens(subject={"uid": str(found_user.uid)})
     response = JSONResponse(content=tokens.model_dump())
     return await set_tokens_to_cookie(response=response, tokens=tokens)
 
 @router.post("/refresh/", response_model=TokenAccessRefresh)
 async def refresh(
-    credentials: JwtAuthorizationCredentials = Security(refresh_security),
+    token: VerifiedToken = Depends(get_refresh_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    return await create_tokens(credentials.subject)
+    # Ротация: refresh-токен одноразовый, повторное использование
+    # (в том числе параллельное) получает 401.
+    if not token.jti or not await revocation_store.revoke(db, token.jti, token.expires_at):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has been revoked",
+        )
+    tokens = await create_tokens(subject={"uid": str(token.user.uid)})
+    await db.commit()
+    return tokens
 
 
 @router.delete("/logout/", status_code=status.HTTP_204_NO_CONTENT)
 async def logout(
-    credentials: JwtAuthorizationCredentials = Security(access_security),
+    request: Request,
+    token: VerifiedToken = Depends(get_access_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
+    revoked = [token]
+    refresh_token = request.cookies.get(REFRESH_TOKEN_COOKIE_KEY)
+    if refresh_token:
+        try:
+            revoked.append(verify_token(refresh_security, refresh_token, "refresh"))
+        except HTTPException:
+            pass
+    for item in revoked:
+        if item.jti:
+            await revocation_store.revoke(db, item.jti, item.expires_at)
+    await db.commit()
+
     response = Response()
     response.delete_cookie(ACCESS_TOKEN_COOKIE_KEY)
     response.delete_cookie(REFRESH_TOKEN_COOKIE_KEY)
-    return response
\ No newline at end of file
+    return response
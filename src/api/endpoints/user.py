@@ -1,23 +1,29 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Request, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+from src.conf import auth_settings
 from src.crud.user import crud_user
 from src.database import get_async_db
-from src.models import User
-from src.schemas.user import UserResponse, UserCreate, UserUpdate
+from src.schemas.user import UserPage, UserResponse, UserCreate, UserSnapshot, UserUpdate
 from src.services import user_service
 from src.services.auth import get_current_user
 
 router = APIRouter()
 
 @router.get("",
-            response_model=list[UserResponse],
-            description="Get all users",)
+            response_model=UserPage,
+            description="Get users page by page, ordered by id",)
 async def get_users(
+        cursor: Optional[str] = None,
+        limit: int = Query(
+            auth_settings.USER_LIST_DEFAULT_LIMIT, ge=1, le=auth_settings.USER_LIST_MAX_LIMIT
+        ),
         db: AsyncSession = Depends(get_async_db),
 ):
-    return await crud_user.get_users_all(db)
+    return await user_service.list_users(db, cursor=cursor, limit=limit)
 
 
 @router.post(
@@ -49,7 +55,7 @@ async def create_user(
 async def update_user(
         update_data: UserUpdate,
         db: AsyncSession = Depends(get_async_db),
-        current_user: User = Depends(get_current_user),
+        current_user: UserSnapshot = Depends(get_current_user),
 ):
     await user_service.update_user(
         db=db, update_schema=update_data, user=current_user
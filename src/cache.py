@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+from src.conf import auth_settings
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """LRU-кэш с ограничением размера и временем жизни записей.
+
+    Кэш живёт в памяти процесса и не синхронизируется между воркерами:
+    после инвалидации в одном процессе другие могут отдавать старое
+    значение не дольше ``ttl`` секунд.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+user_cache: TTLCache = TTLCache(
+    maxsize=auth_settings.USER_CACHE_MAXSIZE,
+    ttl=auth_settings.USER_CACHE_TTL,
+)
+
+# Проверенные access-токены: sha256 токена -> VerifiedToken.
+token_cache: TTLCache = TTLCache(
+    maxsize=auth_settings.TOKEN_CACHE_MAXSIZE if auth_settings.TOKEN_CACHE_ENABLED else 0,
+    ttl=auth_settings.TOKEN_CACHE_TTL,
+)
@@ -1,7 +1,8 @@
 from pathlib import Path
-from typing import Optional
+from typing import Annotated, Literal, Optional
 
 from dotenv import load_dotenv
+from pydantic import BaseModel, BeforeValidator
 from pydantic_settings import BaseSettings
 from sqlalchemy.orm import declarative_base
 load_dotenv()
@@ -20,6 +21,14 @@ class DBSettings(BaseSetting):
     POSTGRES_DB: str
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds
+    DB_POOL_RECYCLE: int = 300  # seconds
+    DB_POOL_PRE_PING: bool = True
+    DB_ECHO: bool = False
+    POSTGRES_REPLICA_HOSTS: str = ""  # comma-separated host[:port]
+    DB_READ_YOUR_WRITES_WINDOW: int = 5  # seconds
 
 class JWTSettings(BaseSetting):
     JWT_SECRET_KEY: str
@@ -27,10 +36,109 @@ class JWTSettings(BaseSetting):
     JWT_ACCESS_TOKEN_EXPIRES: int  # minutes
     JWT_REFRESH_TOKEN_EXPIRES: int  # minutes
 
+class AuthSettings(BaseSetting):
+    USER_CACHE_MAXSIZE: int = 10_000
+    USER_CACHE_TTL: int = 60  # seconds
+    TOKEN_CACHE_ENABLED: bool = True
+    TOKEN_CACHE_MAXSIZE: int = 50_000
+    TOKEN_CACHE_TTL: int = 5 * 60  # seconds, не дольше срока жизни токена
+    REVOCATION_SYNC_INTERVAL: int = 5  # seconds
+    REVOCATION_BUCKET_SECONDS: int = 60 * 60  # корзина bloom-фильтра по exp
+    REVOCATION_BUCKET_CAPACITY: int = 10_000  # отзывов на корзину
+    REVOCATION_ERROR_RATE: float = 0.001  # доля ложных срабатываний
+    USER_LIST_DEFAULT_LIMIT: int = 50
+    USER_LIST_MAX_LIMIT: int = 500
+    USER_EXPORT_BATCH_SIZE: int = 1000
+    PRESENCE_THROTTLE: int = 5 * 60  # seconds
+    PRESENCE_FLUSH_INTERVAL: int = 10  # seconds
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
 class YandexSetting(BaseSetting):
     YANDEX_APP_ID: str
     YANDEX_CLIENT_SECRET: str
+    YANDEX_HTTP_CONNECT_TIMEOUT: float = 3.0  # seconds
+    YANDEX_HTTP_READ_TIMEOUT: float = 10.0  # seconds
+    YANDEX_HTTP_POOL_TIMEOUT: float = 5.0  # seconds, ожидание свободного соединения
+    YANDEX_HTTP_MAX_CONNECTIONS: int = 20
+    YANDEX_HTTP_MAX_KEEPALIVE: int = 10
+    YANDEX_HTTP_RETRIES: int = 2
+    YANDEX_HTTP_RETRY_BACKOFF: float = 0.2  # seconds
+    YANDEX_CIRCUIT_FAILURES: int = 5  # сбоев подряд до размыкания
+    YANDEX_CIRCUIT_RESET: float = 30.0  # seconds
+
+class AudioSettings(BaseSetting):
+    AUDIO_UPLOAD_DIR: str = "src/static"
+    AUDIO_UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes
+    AUDIO_UPLOAD_MAX_SIZE: int = 500 * 1024 * 1024  # bytes
+    AUDIO_UPLOAD_SESSION_CHUNK_SIZE: int = 8 * 1024 * 1024  # bytes
+    AUDIO_UPLOAD_SESSION_TTL: int = 24 * 60 * 60  # seconds
+    AUDIO_UPLOAD_SESSION_GC_INTERVAL: int = 10 * 60  # seconds
+    AUDIO_LIST_DEFAULT_LIMIT: int = 50
+    AUDIO_LIST_MAX_LIMIT: int = 200
+    AUDIO_INSTANT_UPLOAD_ENABLED: bool = True
+    AUDIO_DOWNLOAD_OFFLOAD: Literal["", "x-accel-redirect", "x-sendfile"] = ""
+    AUDIO_DOWNLOAD_ACCEL_PREFIX: str = "/protected-audio/"
+    AUDIO_USER_QUOTA: int = 10 * 1024 * 1024 * 1024  # bytes, 0 — без ограничения
+    AUDIO_UPLOAD_MAX_CONCURRENT: int = 64  # загрузок одновременно на процесс
+    AUDIO_UPLOAD_MAX_CONCURRENT_PER_USER: int = 4
+    AUDIO_UPLOAD_USER_RATE: int = 16 * 1024 * 1024  # bytes/s, 0 — без ограничения
+    AUDIO_UPLOAD_RATE: int = 0  # bytes/s на процесс, 0 — без ограничения
+    AUDIO_UPLOAD_RATE_BURST: int = 4 * 1024 * 1024  # bytes
+
+class StorageSettings(BaseSetting):
+    STORAGE_BACKEND: str = "local"  # "local" или "s3"
+    S3_ENDPOINT_URL: Optional[str] = None
+    S3_REGION: Optional[str] = None
+    S3_BUCKET: str = "audio"
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PART_SIZE: int = 8 * 1024 * 1024  # bytes
+
+class JobSettings(BaseSetting):
+    JOB_WORKER_PROCESSES: int = 0  # 0 — по числу ядер
+    JOB_WORKER_CONCURRENCY: int = 4  # задач одновременно в одном процессе
+    JOB_POLL_INTERVAL: float = 1.0  # seconds
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_DELAY: float = 5.0  # seconds
+    JOB_RETRY_MAX_DELAY: float = 10 * 60  # seconds
+    JOB_LOCK_TIMEOUT: int = 30 * 60  # seconds
+
+
+class RenditionSpec(BaseModel):
+    codec: str  # кодер ffmpeg
+    bitrate: str  # например "64k"
+    format: str  # муксер ffmpeg
+    extension: str
+    media_type: str
+    options: list[str] = []
+
+
+class TranscodeSettings(BaseSetting):
+    FFMPEG_PATH: str = "ffmpeg"
+    TRANSCODE_CONCURRENCY: int = 2  # процессов ffmpeg на один процесс воркера
+    TRANSCODE_TIMEOUT: int = 10 * 60  # seconds
+    AUDIO_RENDITIONS: dict[str, RenditionSpec] = {
+        "opus_64k": RenditionSpec(
+            codec="libopus", bitrate="64k", format="ogg",
+            extension="opus", media_type="audio/ogg",
+        ),
+        "aac_128k": RenditionSpec(
+            codec="aac", bitrate="128k", format="ipod",
+            extension="m4a", media_type="audio/mp4",
+            options=["-movflags", "+faststart"],
+        ),
+    }
+
 
+class WaveformSettings(BaseSetting):
+    PEAKS_SAMPLE_RATE: int = 8000  # Hz, частота декодирования для расчёта пиков
+    PEAKS_BLOCK_SIZE: int = 256  # сэмплов на пик самого подробного уровня
+    # Из окружения приходит строка, а Literal сравнивает без приведения.
+    PEAKS_BITS: Annotated[Literal[8, 16], BeforeValidator(int)] = 8
+    PEAKS_MIN_LEVEL_SIZE: int = 64  # пиков в самом грубом уровне
+    PEAKS_DEFAULT_RESOLUTION: int = 1000
+    PEAKS_CONCURRENCY: int = 2  # процессов ffmpeg для пиков на один процесс воркера
 
 YANDEX_AUTH_BASE_URL = "https://oauth.yandex.ru/authorize?"
 YANDEX_TOKEN_URL = "https://oauth.yandex.ru/token"
@@ -43,3 +151,9 @@ Base = declarative_base()
 yandex_settings = YandexSetting()
 db_settings = DBSettings()
 jwt_settings = JWTSettings()
+auth_settings = AuthSettings()
+audio_settings = AudioSettings()
+storage_settings = StorageSettings()
+job_settings = JobSettings()
+transcode_settings = TranscodeSettings()
+waveform_settings = WaveformSettings()
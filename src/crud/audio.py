@@ -1,5 +1,11 @@
+from collections import Counter
+from typing import Any, Optional
+
+from sqlalchemy import Integer, column, delete, func, literal, select, tuple_, update, values
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.models import AudioFile
+from src.models import AudioBlob, AudioFile, AudioRendition
+from src.schemas.audio import AudioFileFilter, AudioFileSort, SortOrder
 
 class CRUDAudio:
     def __init__(self, session: AsyncSession):
@@ -9,23 +15,273 @@ class CRUDAudio:
         self,
         user_id: int,
         file_name: str,
-        file_path: str
+        file_path: str,
+        blob_id: Optional[int] = None,
+        format: Optional[str] = None,
+        metadata: Optional[dict] = None,
+        commit: bool = True,
     ) -> AudioFile:
         audio_file = AudioFile(
             user_id=user_id,
             file_name=file_name,
-            file_path=file_path
+            file_path=file_path,
+            blob_id=blob_id,
+            format=format,
+            **(metadata or {}),
         )
         self.session.add(audio_file)
-        await self.session.commit()
-        await self.session.refresh(audio_file)
+        if commit:
+            await self.session.commit()
+            await self.session.refresh(audio_file)
+        else:
+            await self.session.flush()
         return audio_file
 
     async def get_user_audio_files(
         self,
-        user_id: int
+        user_id: int,
+        *,
+        filters: Optional[AudioFileFilter] = None,
+        sort: AudioFileSort = AudioFileSort.id,
+        order: SortOrder = SortOrder.desc,
+        after: Optional[tuple[Any, int]] = None,
+        limit: Optional[int] = None,
     ) -> list[AudioFile]:
-        from sqlalchemy import select
+        """Keyset-пагинация: ``after`` — пара (значение сортировки, id)
+        последней строки предыдущей страницы."""
         stmt = select(AudioFile).where(AudioFile.user_id == user_id)
+        if filters:
+            stmt = self._apply_filters(stmt, filters)
+
+        sort_column = getattr(AudioFile, sort.value)
+        descending = order == SortOrder.desc
+        if after is not None:
+            value, last_id = after
+            if sort == AudioFileSort.id:
+                key, bound = AudioFile.id, last_id
+            else:
+                key = tuple_(sort_column, AudioFile.id)
+                bound = tuple_(literal(value, sort_column.type), literal(last_id, Integer))
+            stmt = stmt.where(key < bound if descending else key > bound)
+
+        if sort == AudioFileSort.id:
+            order_by = [AudioFile.id.desc() if descending else AudioFile.id.asc()]
+        elif descending:
+            order_by = [sort_column.desc(), AudioFile.id.desc()]
+        else:
+            order_by = [sort_column.asc(), AudioFile.id.asc()]
+        stmt = stmt.order_by(*order_by)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        result = await self.session.execute(stmt.execution_options(replica=True))
+        return result.scalars().all()
+
+    @staticmethod
+    def _apply_filters(stmt, filters: AudioFileFilter):
+        if filters.name_prefix:
+            stmt = stmt.where(
+                AudioFile.file_name.startswith(filters.name_prefix, autoescape=True)
+            )
+        if filters.format:
+            stmt = stmt.where(AudioFile.format == filters.format.lower().lstrip("."))
+        if filters.codec:
+            stmt = stmt.where(AudioFile.codec == filters.codec.lower())
+        if filters.min_bitrate is not None:
+            stmt = stmt.where(AudioFile.bitrate >= filters.min_bitrate)
+        if filters.min_duration is not None:
+            stmt = stmt.where(AudioFile.duration >= filters.min_duration)
+        if filters.max_duration is not None:
+            stmt = stmt.where(AudioFile.duration <= filters.max_duration)
+        if filters.created_from is not None:
+            stmt = stmt.where(AudioFile.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            stmt = stmt.where(AudioFile.created_at < filters.created_to)
+        return stmt
+
+    async def get_blob_metadata(self, blob_id: int) -> Optional[dict]:
+        """Метаданные другого файла с тем же содержимым, если они уже извлечены."""
+        stmt = (
+            select(
+                AudioFile.codec,
+                AudioFile.duration,
+                AudioFile.sample_rate,
+                AudioFile.channels,
+                AudioFile.bitrate,
+                AudioFile.size,
+            )
+            .where(AudioFile.blob_id == blob_id, AudioFile.size.is_not(None))
+            .limit(1)
+        )
+        row = (await self.session.execute(stmt)).first()
+        return row._asdict() if row else None
+
+    async def get_audio_file_blob(self, file_id: int) -> Optional[AudioBlob]:
+        stmt = (
+            select(AudioBlob)
+            .join(AudioFile, AudioFile.blob_id == AudioBlob.id)
+            .where(AudioFile.id == file_id)
+        )
         result = await self.session.execute(stmt)
-        return result.scalars().all()
\ No newline at end of file
+        return result.scalars().first()
+
+    async def get_blob(self, blob_id: int) -> Optional[AudioBlob]:
+        return await self.session.get(AudioBlob, blob_id)
+
+    async def set_blob_peaks(self, blob_id: int, peaks_key: str) -> bool:
+        result = await self.session.execute(
+            update(AudioBlob).where(AudioBlob.id == blob_id).values(peaks_key=peaks_key)
+        )
+        await self.session.commit()
+        return result.rowcount > 0
+
+    async def get_renditions(self, blob_id: int) -> list[AudioRendition]:
+        stmt = (
+            select(AudioRendition)
+            .where(AudioRendition.blob_id == blob_id)
+            .order_by(AudioRendition.size)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def create_rendition(
+        self,
+        blob_id: int,
+        name: str,
+        codec: str,
+        bitrate: str,
+        media_type: str,
+        storage_key: str,
+        size: int,
+    ) -> AudioRendition:
+        data = {
+            "codec": codec,
+            "bitrate": bitrate,
+            "media_type": media_type,
+            "storage_key": storage_key,
+            "size": size,
+        }
+        stmt = (
+            insert(AudioRendition)
+            .values(blob_id=blob_id, name=name, **data)
+            .on_conflict_do_update(constraint="uq_audio_rendition_blob_id_name", set_=data)
+            .returning(AudioRendition)
+        )
+        rendition = (await self.session.execute(stmt)).scalars().one()
+        await self.session.commit()
+        return rendition
+
+    async def update_audio_metadata(self, file_id: int, **metadata: Any) -> None:
+        await self.session.execute(
+            update(AudioFile).where(AudioFile.id == file_id).values(**metadata)
+        )
+        await self.session.commit()
+
+    async def get_user_audio_file(
+        self,
+        file_id: int,
+        user_id: int
+    ) -> Optional[AudioFile]:
+        stmt = select(AudioFile).where(
+            AudioFile.id == file_id,
+            AudioFile.user_id == user_id,
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def acquire_blob(
+        self,
+        sha256: str,
+        size: Optional[int] = None
+    ) -> Optional[AudioBlob]:
+        """Увеличивает счётчик ссылок на существующий blob (без commit)."""
+        stmt = update(AudioBlob).where(AudioBlob.sha256 == sha256)
+        if size is not None:
+            stmt = stmt.where(AudioBlob.size == size)
+        stmt = (
+            stmt
+            .values(ref_count=AudioBlob.ref_count + 1)
+            .returning(AudioBlob)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def create_blob(
+        self,
+        sha256: str,
+        size: int,
+        storage_key: str
+    ) -> Optional[AudioBlob]:
+        """Создаёт blob (без commit). Возвращает None, если blob с таким
+        хэшем уже есть: тогда нужно взять ссылку через ``acquire_blob``."""
+        stmt = (
+            insert(AudioBlob)
+            .values(sha256=sha256, size=size, storage_key=storage_key, ref_count=1)
+            .on_conflict_do_nothing(index_elements=[AudioBlob.sha256])
+            .returning(AudioBlob)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def lock_content(self, sha256: str) -> None:
+        """Блокировка содержимого до конца транзакции. Её берут и запись
+        нового содержимого, и удаление ненужного из хранилища: ключи
+        выводятся из хэша, и без блокировки удаление старой копии могло бы
+        стереть только что записанную новую."""
+        await self.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(sha256))))
+
+    async def blob_exists(self, sha256: str) -> bool:
+        stmt = select(literal(True)).where(AudioBlob.sha256 == sha256)
+        return (await self.session.execute(stmt)).scalar() is not None
+
+    async def release_user_audio_files(self, user_id: int) -> list[tuple[Optional[str], str]]:
+        """Удаляет файлы пользователя и уменьшает счётчики ссылок на blob'ы
+        (без commit).
+
+        Возвращает пары (sha256, ключ) объектов хранилища, которые больше
+        никем не используются; sha256 пуст у файлов без blob'а. Объекты
+        удаляются после commit через ``lock_content`` и ``blob_exists``.
+        """
+        stmt = (
+            delete(AudioFile)
+            .where(AudioFile.user_id == user_id)
+            .returning(AudioFile.blob_id, AudioFile.file_path)
+        )
+        rows = (await self.session.execute(stmt)).all()
+        orphaned_keys = [(None, row.file_path) for row in rows if row.blob_id is None]
+        released = Counter(row.blob_id for row in rows if row.blob_id is not None)
+        if not released:
+            return orphaned_keys
+
+        counts = values(
+            column("id", Integer), column("n", Integer), name="released"
+        ).data(list(released.items()))
+        await self.session.execute(
+            update(AudioBlob)
+            .where(AudioBlob.id == counts.c.id)
+            .values(ref_count=AudioBlob.ref_count - counts.c.n)
+        )
+        unused = select(AudioBlob.id).where(
+            AudioBlob.id.in_(released.keys()), AudioBlob.ref_count <= 0
+        )
+        stmt = (
+            delete(AudioRendition)
+            .where(AudioRendition.blob_id.in_(unused))
+            .returning(AudioRendition.blob_id, AudioRendition.storage_key)
+        )
+        renditions = (await self.session.execute(stmt)).all()
+        stmt = (
+            delete(AudioBlob)
+            .where(AudioBlob.id.in_(released.keys()), AudioBlob.ref_count <= 0)
+            .returning(AudioBlob.id, AudioBlob.sha256, AudioBlob.storage_key, AudioBlob.peaks_key)
+        )
+        blobs = (await self.session.execute(stmt)).all()
+        hashes = {row.id: row.sha256 for row in blobs}
+        blob_keys = [
+            (row.sha256, key)
+            for row in blobs
+            for key in (row.storage_key, row.peaks_key)
+            if key
+        ]
+        rendition_keys = [(hashes[row.blob_id], row.storage_key) for row in renditions]
+        return orphaned_keys + rendition_keys + blob_keys
@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta, UTC
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models import Job
+
+class CRUDJob:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def enqueue(
+        self,
+        kind: str,
+        payload: dict,
+        *,
+        priority: int = 0,
+        max_attempts: int,
+        delay: float = 0,
+    ) -> Job:
+        """Добавляет задачу в текущую транзакцию, не фиксируя её: задача
+        появится в очереди только вместе с данными, которые её породили."""
+        job = Job(
+            kind=kind,
+            payload=payload,
+            priority=priority,
+            max_attempts=max_attempts,
+        )
+        if delay:
+            job.run_at = datetime.now(UTC) + timedelta(seconds=delay)
+        self.session.add(job)
+        await self.session.flush()
+        return job
+
+    async def claim(self, worker_id: str, kinds: Iterable[str], limit: int) -> list[Job]:
+        candidates = (
+            select(Job.id)
+            .where(
+                Job.status == Job.QUEUED,
+                Job.run_at <= func.now(),
+                Job.kind.in_(list(kinds)),
+            )
+            .order_by(Job.priority.desc(), Job.run_at, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Job)
+            .where(Job.id.in_(candidates))
+            .values(
+                status=Job.RUNNING,
+                attempts=Job.attempts + 1,
+                locked_at=func.now(),
+                locked_by=worker_id,
+            )
+            .returning(Job)
+        )
+        result = await self.session.execute(stmt)
+        jobs = list(result.scalars().all())
+        await self.session.commit()
+        return jobs
+
+    @staticmethod
+    def _owned(job_id: int, worker_id: str):
+        """Условие на задачу, которую держит воркер. Если задачу вернули в
+        очередь по таймауту и её взял другой воркер, отчёт прежнего
+        владельца ничего не меняет."""
+        return (Job.id == job_id, Job.status == Job.RUNNING, Job.locked_by == worker_id)
+
+    async def complete(self, job_id: int, worker_id: str) -> bool:
+        result = await self.session.execute(delete(Job).where(*self._owned(job_id, worker_id)))
+        await self.session.commit()
+        return bool(result.rowcount)
+
+    async def retry_or_fail(self, job: Job, worker_id: str, error: str, delay: float) -> bool:
+        """Возвращает задачу в очередь с отсрочкой или, если попытки
+        исчерпаны, помечает её упавшей. Возвращает True при повторе."""
+        retry = job.attempts < job.max_attempts
+        values = {"locked_at": None, "locked_by": None, "last_error": error}
+        if retry:
+            values.update(
+                status=Job.QUEUED,
+                run_at=datetime.now(UTC) + timedelta(seconds=delay),
+            )
+        else:
+            values.update(status=Job.FAILED)
+        await self.session.execute(
+            update(Job).where(*self._owned(job.id, worker_id)).values(**values)
+        )
+        await self.session.commit()
+        return retry
+
+    async def heartbeat(self, worker_id: str, job_ids: Iterable[int]) -> int:
+        """Продлевает блокировку выполняемых задач, чтобы долгие задачи не
+        считались зависшими."""
+        stmt = (
+            update(Job)
+            .where(
+                Job.id.in_(list(job_ids)),
+                Job.status == Job.RUNNING,
+                Job.locked_by == worker_id,
+            )
+            .values(locked_at=func.now())
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount
+
+    async def requeue_stale(self, lock_timeout: float) -> int:
+        """Возвращает в очередь задачи воркеров, которые упали, не успев
+        отчитаться о результате."""
+        stmt = (
+            update(Job)
+            .where(
+                Job.status == Job.RUNNING,
+                Job.locked_at < func.now() - timedelta(seconds=lock_timeout),
+            )
+            .values(
+                status=case((Job.attempts >= Job.max_attempts, Job.FAILED), else_=Job.QUEUED),
+                locked_at=None,
+                locked_by=None,
+                last_error="Воркер не завершил задачу вовремя",
+            )
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount
+
+    async def count_by_status(self) -> dict[str, int]:
+        stmt = select(Job.status, func.count()).group_by(Job.status)
+        result = await self.session.execute(stmt)
+        return dict(result.all())
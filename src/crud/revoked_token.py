@@ -0,0 +1,45 @@
+from datetime import datetime, UTC
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import RevokedToken
+
+
+class CRUDRevokedToken:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def revoke(self, jti: str, expires_at: datetime) -> bool:
+        """Отзывает токен (без commit). Возвращает False, если он уже был
+        отозван, — так ротация refresh-токена срабатывает ровно один раз."""
+        stmt = (
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at)
+            .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+            .returning(RevokedToken.jti)
+        )
+        return (await self.session.execute(stmt)).first() is not None
+
+    async def is_revoked(self, jti: str) -> bool:
+        stmt = select(RevokedToken.jti).where(RevokedToken.jti == jti)
+        return (await self.session.execute(stmt)).first() is not None
+
+    async def get_revoked_since(
+        self, since: Optional[datetime]
+    ) -> list[tuple[str, datetime, datetime]]:
+        """Неистёкшие отзывы, сделанные после ``since``: (jti, expires_at, revoked_at)."""
+        stmt = select(
+            RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at
+        ).where(RevokedToken.expires_at > datetime.now(UTC))
+        if since is not None:
+            stmt = stmt.where(RevokedToken.revoked_at > since)
+        return [tuple(row) for row in (await self.session.execute(stmt)).all()]
+
+    async def delete_expired(self) -> int:
+        stmt = delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(UTC))
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return result.rowcount
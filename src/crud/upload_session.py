@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models import UploadSession
+
+class CRUDUploadSession:
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def create_upload_session(
+        self,
+        user_id: int,
+        file_name: str,
+        filename: str,
+        content_type: str,
+        total_size: int,
+        chunk_size: int,
+        ttl: int,
+    ) -> UploadSession:
+        upload_session = UploadSession(
+            user_id=user_id,
+            file_name=file_name,
+            filename=filename,
+            content_type=content_type,
+            total_size=total_size,
+            chunk_size=chunk_size,
+            expires_at=datetime.now(UTC) + timedelta(seconds=ttl),
+        )
+        self.session.add(upload_session)
+        await self.session.commit()
+        await self.session.refresh(upload_session)
+        return upload_session
+
+    async def get_user_upload_session(
+        self,
+        session_id: UUID,
+        user_id: int
+    ) -> Optional[UploadSession]:
+        stmt = select(UploadSession).where(
+            UploadSession.id == session_id,
+            UploadSession.user_id == user_id,
+            UploadSession.expires_at > datetime.now(UTC),
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def claim_upload_session(
+        self,
+        session_id: UUID,
+        user_id: int
+    ) -> Optional[UploadSession]:
+        """Удаляет сессию и возвращает её (без commit). Параллельный вызов
+        ждёт блокировку строки и после commit первого не находит сессию,
+        а после отката получает её снова."""
+        stmt = (
+            delete(UploadSession)
+            .where(
+                UploadSession.id == session_id,
+                UploadSession.user_id == user_id,
+                UploadSession.expires_at > datetime.now(UTC),
+            )
+            .returning(UploadSession)
+        )
+        result = await self.session.execute(stmt)
+        return result.scalars().first()
+
+    async def delete_expired_upload_sessions(self) -> list[UUID]:
+        stmt = (
+            delete(UploadSession)
+            .where(UploadSession.expires_at <= datetime.now(UTC))
+            .returning(UploadSession.id)
+        )
+        result = await self.session.execute(stmt)
+        await self.session.commit()
+        return list(result.scalars().all())
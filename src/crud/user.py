@@ -1,13 +1,16 @@
-from typing import Optional, Type, TypeVar, Union
+from typing import AsyncIterator, Optional, Sequence, Type, TypeVar, Union
 from uuid import UUID
 
 from pydantic import BaseModel
-from sqlalchemy import select, insert, update, delete
+from sqlalchemy import Row, Select, select, insert, update, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import DeclarativeBase, load_only
+from sqlalchemy.orm import DeclarativeBase, load_only, selectinload
 
+from src.cache import user_cache
+from src.database import on_commit
 from src.models.user import User
-from src.schemas.user import UserUpdateDB
+from src.schemas.user import UserSnapshot, UserUpdateDB
 
 ModelType = TypeVar("ModelType", bound=DeclarativeBase)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
@@ -31,10 +34,42 @@ class CRUDUser:
             await db.refresh(obj)
         return obj
 
+    async def upsert_oauth_user(
+        self,
+        db: AsyncSession,
+        *,
+        service_id_field: str,
+        create_schema: CreateSchemaType,
+        commit: bool = True,
+    ) -> ModelType:
+        """Создаёт пользователя внешнего сервиса или возвращает уже
+        существующего одним запросом.
+
+        ``DO UPDATE`` присваивает столбцу его же значение: запись не
+        меняется, но блокируется и попадает в ``RETURNING``, поэтому
+        параллельные первые входы получают одну и ту же строку.
+        """
+        data = create_schema.model_dump(exclude_unset=True)
+        service_id = getattr(self.model, service_id_field)
+        stmt = (
+            pg_insert(self.model)
+            .values(**data)
+            .on_conflict_do_update(index_elements=[service_id], set_={service_id_field: service_id})
+            .returning(self.model)
+        )
+        obj = (await db.execute(stmt)).scalars().first()
+        if commit:
+            await db.commit()
+        return obj
+
     async def get_by_email(
         self, db: AsyncSession, *, email: str
     ) -> Optional[User]:
-        statement = select(self.model).where(self.model.email == email)
+        statement = (
+            select(self.model)
+            .where(self.model.email == email)
+            .execution_options(replica=True)
+        )
         result = await db.execute(statement)
         return result.scalars().first()
 
@@ -57,6 +92,28 @@ class CRUDUser:
         result = await db.execute(statement)
         return result.scalars().first()
 
+    async def get_by_uid(
+        self, db: AsyncSession, *, uid: UUID
+    ) -> Optional[User]:
+        """Минимальная проекция пользователя для проверки авторизации."""
+        statement = (
+            select(self.model)
+            .where(self.model.uid == uid)
+            .options(
+                load_only(
+                    self.model.id,
+                    self.model.uid,
+                    self.model.username,
+                    self.model.email,
+                    self.model.is_superuser,
+                    self.model.yandex_id,
+                )
+            )
+            .execution_options(replica=True)
+        )
+        result = await db.execute(statement)
+        return result.scalars().first()
+
     async def make_superuser(
             self,
             db: AsyncSession,
@@ -73,6 +130,7 @@ class CRUDUser:
         )
         result = await db.execute(stmt)
         user = result.scalars().first()
+        on_commit(db, lambda: user_cache.invalidate(uid))
         if commit:
             await db.commit()
             if user:
@@ -88,6 +146,7 @@ class CRUDUser:
     ) -> bool:
         stmt = delete(self.model).where(self.model.uid == uid)
         result = await db.execute(stmt)
+        on_commit(db, lambda: user_cache.invalidate(uid))
         if commit:
             await db.commit()
         return result.rowcount > 0
@@ -96,7 +155,7 @@ class CRUDUser:
         self,
         db: AsyncSession,
         *,
-        db_obj: User,
+        db_obj: Union[User, UserSnapshot],
         update_data: Union[UserUpdateDB, dict],
         commit: bool = True,
     ) -> User:
@@ -112,10 +171,37 @@ class CRUDUser:
         )
         result = await db.execute(stmt)
         obj = result.scalars().first()
+        uid = db_obj.uid
+        on_commit(db, lambda: user_cache.invalidate(uid))
         if commit:
             await db.commit()
             await db.refresh(obj)
         return obj
+    async def get_storage_used(self, db: AsyncSession, *, user_id: int) -> int:
+        statement = select(self.model.storage_used).where(self.model.id == user_id)
+        return (await db.execute(statement)).scalar() or 0
+
+    async def charge_storage(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        size: int,
+        quota: Optional[int] = None,
+    ) -> bool:
+        """Увеличивает занятый пользователем объём, если он укладывается
+        в квоту (без commit). Проверка и увеличение — один UPDATE, поэтому
+        параллельные загрузки не могут вместе превысить квоту."""
+        stmt = (
+            update(self.model)
+            .where(self.model.id == user_id)
+            .values(storage_used=self.model.storage_used + size)
+            .returning(self.model.id)
+        )
+        if quota:
+            stmt = stmt.where(self.model.storage_used + size <= quota)
+        return (await db.execute(stmt)).first() is not None
+
     async def get_user_with_full_options(
         self, db: AsyncSession, *, user_id: int
     ) -> Optional[User]:
@@ -127,9 +213,22 @@ class CRUDUser:
         result = await db.execute(statement)
         return result.scalars().first()
 
+    async def get_user_with_audio_files(
+        self, db: AsyncSession, *, user_id: int
+    ) -> Optional[User]:
+        statement = (
+            select(self.model)
+            .where(self.model.id == user_id)
+            .options(selectinload(self.model.audio_files))
+        )
+        result = await db.execute(statement)
+        return result.scalars().first()
+
     async def delete(self, db: AsyncSession, *, db_obj: User, commit: bool = True):
         stmt = delete(self.model).where(self.model.id == db_obj.id)
         await db.execute(stmt)
+        uid = db_obj.uid
+        on_commit(db, lambda: user_cache.invalidate(uid))
         if commit:
             await db.commit()
 
@@ -145,10 +244,31 @@ class CRUDUser:
         )
         result = await db.execute(statement)
         return result.scalars().first()
-    async def get_users_all(self, db: AsyncSession):
-        statement = select(self.model)
+    def _listing(self) -> Select:
+        """Проекция для списков: только публичные столбцы, строки без сборки
+        ORM-объектов; порядок по id для keyset-пагинации."""
+        return (
+            select(self.model.id, self.model.uid, self.model.username, self.model.email)
+            .order_by(self.model.id)
+            .execution_options(replica=True)
+        )
+
+    async def get_users_page(
+        self, db: AsyncSession, *, after_id: Optional[int] = None, limit: int
+    ) -> list[Row]:
+        statement = self._listing().limit(limit)
+        if after_id is not None:
+            statement = statement.where(self.model.id > after_id)
         result = await db.execute(statement)
-        return result.scalars().all()
+        return list(result.all())
+
+    async def stream_users(
+        self, db: AsyncSession, *, batch_size: int
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Все пользователи пачками через серверный курсор."""
+        result = await db.stream(self._listing().execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
 
 
 crud_user = CRUDUser(User)
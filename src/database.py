@@ -1,6 +1,11 @@
-from typing import AsyncGenerator
+import random
+import time
+from typing import AsyncGenerator, Callable, Hashable
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.conf import db_settings
 
@@ -20,28 +25,229 @@ SQLALCHEMY_DATABASE_URL_ALEMBIC= (
     f"{db_settings.POSTGRES_PORT}/"
     f"{db_settings.POSTGRES_DB}"
 )
-async_engine = create_async_engine(
-    url=SQLALCHEMY_DATABASE_URL,
-    pool_size=20,
-    max_overflow=10,
-    echo=True,
-    pool_pre_ping=True,
-    pool_timeout=30,
-    pool_recycle=300,
-)
+
+
+class PoolMonitor:
+    """Статистика пула соединений одного движка.
+
+    Выдачи и новые соединения считают события пула, время ожидания
+    свободного соединения и таймауты — ``MonitoredPool.connect``. Монитор
+    привязан к движку по имени пула, поэтому статистика переживает
+    пересоздание пула при ``dispose``.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.checkouts = 0
+        self.connects = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "connect", self._on_connect)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connects += 1
+
+    def record_wait(self, waited: float) -> None:
+        self.waits += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+
+    def stats(self) -> dict:
+        pool = self.engine.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "timeouts": self.timeouts,
+            "wait_time_avg": self.wait_time_total / self.waits if self.waits else 0.0,
+            "wait_time_max": self.wait_time_max,
+        }
+
+
+pool_monitors: dict[str, PoolMonitor] = {}
+
+
+class MonitoredPool(AsyncAdaptedQueuePool):
+    """Пул, замеряющий ожидание в публичном ``connect``: событие
+    ``checkout`` приходит уже после того, как соединение получено."""
+
+    def connect(self):
+        monitor = pool_monitors.get(self.logging_name)
+        if monitor is None:
+            return super().connect()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            monitor.timeouts += 1
+            raise
+        finally:
+            monitor.record_wait(time.perf_counter() - started)
+
+
+def create_monitored_engine(url: str, name: str):
+    engine = create_async_engine(
+        url=url,
+        poolclass=MonitoredPool,
+        pool_logging_name=name,
+        pool_size=db_settings.DB_POOL_SIZE,
+        max_overflow=db_settings.DB_MAX_OVERFLOW,
+        echo=db_settings.DB_ECHO,
+        pool_pre_ping=db_settings.DB_POOL_PRE_PING,
+        pool_timeout=db_settings.DB_POOL_TIMEOUT,
+        pool_recycle=db_settings.DB_POOL_RECYCLE,
+    )
+    pool_monitors[name] = PoolMonitor(engine)
+    return engine
+
+
+async_engine = create_monitored_engine(SQLALCHEMY_DATABASE_URL, "primary")
+
+
+def replica_url(host: str) -> str:
+    host, _, port = host.strip().partition(":")
+    return (
+        "postgresql+asyncpg://"
+        f"{db_settings.POSTGRES_USER}:"
+        f"{db_settings.POSTGRES_PASSWORD}@"
+        f"{host}:"
+        f"{port or db_settings.POSTGRES_PORT}/"
+        f"{db_settings.POSTGRES_DB}"
+    )
+
+
+replica_engines = [
+    create_monitored_engine(replica_url(host), f"replica:{host.strip()}")
+    for host in db_settings.POSTGRES_REPLICA_HOSTS.split(",")
+    if host.strip()
+]
+
+
+class RecentWrites:
+    """Помнит, кто недавно писал в primary, чтобы в течение ``window`` секунд
+    его чтения не уходили на реплику, которая могла ещё не догнать primary.
+
+    Состояние живёт в памяти процесса — как и кэш пользователей.
+    """
+
+    def __init__(self, window: float, maxsize: int = 10_000):
+        self.window = window
+        self.maxsize = maxsize
+        self._writes: dict[Hashable, float] = {}
+
+    def record(self, key: Hashable) -> None:
+        now = time.monotonic()
+        if len(self._writes) >= self.maxsize:
+            self._writes = {
+                k: ts for k, ts in self._writes.items() if now - ts < self.window
+            }
+        self._writes[key] = now
+
+    def is_recent(self, key: Hashable) -> bool:
+        written_at = self._writes.get(key)
+        if written_at is None:
+            return False
+        if time.monotonic() - written_at < self.window:
+            return True
+        self._writes.pop(key, None)
+        return False
+
+
+recent_writes = RecentWrites(window=db_settings.DB_READ_YOUR_WRITES_WINDOW)
+routing_counters = {"primary": 0, "replica": 0}
+
+
+class RoutingSession(Session):
+    """Сессия, отправляющая чтение на реплику.
+
+    На реплику уходят только запросы, явно помеченные
+    ``execution_options(replica=True)``, и только если сессия ещё ничего не
+    писала в текущей транзакции и ни она, ни пользователь из
+    ``info["user_key"]`` не фиксировали запись в последние
+    ``DB_READ_YOUR_WRITES_WINDOW`` секунд. Всё остальное идёт в primary.
+    """
+
+    def get_bind(self, mapper=None, *, clause=None, **kw):
+        if getattr(clause, "is_dml", False):
+            self.info["wrote"] = True
+        elif replica_engines and self._replica_allowed(clause):
+            routing_counters["replica"] += 1
+            engine = self.info.get("replica_engine")
+            if engine is None:
+                # Реплика выбирается одна на сессию, чтобы чтения в пределах
+                # запроса видели согласованный снимок.
+                engine = self.info["replica_engine"] = random.choice(replica_engines)
+            return engine.sync_engine
+        routing_counters["primary"] += 1
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def _replica_allowed(self, clause) -> bool:
+        options = getattr(clause, "_execution_options", None) or {}
+        if not options.get("replica"):
+            return False
+        if self.info.get("wrote"):
+            return False
+        committed_at = self.info.get("committed_at")
+        if committed_at is not None and time.monotonic() - committed_at < recent_writes.window:
+            return False
+        user_key = self.info.get("user_key")
+        return user_key is None or not recent_writes.is_recent(user_key)
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_commit(session: Session) -> None:
+    if session.info.pop("wrote", False):
+        session.info["committed_at"] = time.monotonic()
+        user_key = session.info.get("user_key")
+        if user_key is not None:
+            recent_writes.record(user_key)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _remember_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _forget_writes(session: Session) -> None:
+    session.info.pop("wrote", None)
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Вызывает ``callback`` после commit текущей транзакции сессии; при
+    откате вызов отменяется. Нужно для сброса кэшей: сброс до commit
+    позволил бы параллельному запросу снова закэшировать старые данные."""
+    session.info.setdefault("on_commit", []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_commit_callbacks(session: Session) -> None:
+    for callback in session.info.pop("on_commit", ()):
+        callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_commit_callbacks(session: Session) -> None:
+    session.info.pop("on_commit", None)
+
+
 async_session = async_sessionmaker(
     async_engine,
     class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
 )
 
-async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session() as session:
-        yield session
-        await session.close()
-
-
-async def get_async_db() -> AsyncSession:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         try:
             yield session
@@ -50,3 +256,25 @@ async def get_async_db() -> AsyncSession:
             raise
 
 
+# FastAPI кэширует зависимости в пределах запроса по самой функции, поэтому
+# оба имени должны указывать на один объект: тогда авторизация и эндпоинт
+# используют одну сессию и одно соединение из пула.
+get_async_session = get_async_db
+
+
+def routing_stats() -> dict:
+    return {
+        "replicas": len(replica_engines),
+        "primary_statements": routing_counters["primary"],
+        "replica_statements": routing_counters["replica"],
+    }
+
+
+def pool_stats() -> dict:
+    stats = pool_monitors["primary"].stats()
+    stats["replicas"] = {
+        name.partition(":")[2]: monitor.stats()
+        for name, monitor in pool_monitors.items()
+        if name != "primary"
+    }
+    return stats
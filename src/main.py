@@ -1,3 +1,7 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from src.api.endpoints.user import router
@@ -5,11 +9,48 @@ from src.api.endpoints.auth import router as auth
 from src.api.endpoints.admin import router as admin_router
 from src.api.endpoints.auth_yandex import router as auth_yandex
 from src.api.endpoints.audio import router as audio
+from src.conf import audio_settings, auth_settings
+from src.services.periodic import run_periodically
+from src.services.presence import flush_presence
+from src.services.revocation import load_revocations, sync_revocations
+from src.services.upload_session import cleanup_expired_upload_sessions
+from src.services.yndex import yandex_http
+from src.storage import get_storage
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yandex_http.open()
+    await load_revocations()
+    tasks = [
+        asyncio.create_task(
+            run_periodically(
+                audio_settings.AUDIO_UPLOAD_SESSION_GC_INTERVAL,
+                cleanup_expired_upload_sessions,
+            )
+        ),
+        asyncio.create_task(
+            run_periodically(auth_settings.PRESENCE_FLUSH_INTERVAL, flush_presence)
+        ),
+        asyncio.create_task(
+            run_periodically(auth_settings.REVOCATION_SYNC_INTERVAL, sync_revocations)
+        ),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    try:
+        await flush_presence()
+    except Exception as ex:
+        logging.exception(ex)
+    await yandex_http.close()
+    await get_storage().close()
 
 
 def create_app() -> FastAPI:
 
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
 
 
     app.include_router(router, prefix="/api/v1")
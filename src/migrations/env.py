@@ -9,7 +9,7 @@ from src.models.base import Base
 
 from src.database import SQLALCHEMY_DATABASE_URL_ALEMBIC
 from src.database import SQLALCHEMY_DATABASE_URL
-from src.models import User, AudioFile
+from src.models import User, AudioFile, AudioBlob, AudioRendition, UploadSession, Job
 config = context.config
 
 
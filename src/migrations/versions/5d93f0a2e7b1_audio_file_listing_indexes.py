@@ -0,0 +1,40 @@
+"""Audio file listing columns and indexes
+
+Revision ID: 5d93f0a2e7b1
+Revises: c4a7e9b31d05
+Create Date: 2026-10-18 15:20:44.671305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d93f0a2e7b1'
+down_revision: Union[str, None] = 'c4a7e9b31d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('audio_file', sa.Column('format', sa.String(length=8), nullable=True))
+    op.add_column('audio_file', sa.Column('duration', sa.Float(), nullable=True))
+    op.add_column('audio_file', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_index('ix_audio_file_user_id_id', 'audio_file', ['user_id', 'id'], unique=False)
+    op.create_index('ix_audio_file_user_id_created_at_id', 'audio_file', ['user_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_audio_file_user_id_file_name_id', 'audio_file', ['user_id', 'file_name', 'id'], unique=False, postgresql_ops={'file_name': 'text_pattern_ops'})
+    op.create_index('ix_audio_file_user_id_format_id', 'audio_file', ['user_id', 'format', 'id'], unique=False)
+    op.create_index('ix_audio_file_user_id_duration', 'audio_file', ['user_id', 'duration'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audio_file_user_id_duration', table_name='audio_file')
+    op.drop_index('ix_audio_file_user_id_format_id', table_name='audio_file')
+    op.drop_index('ix_audio_file_user_id_file_name_id', table_name='audio_file')
+    op.drop_index('ix_audio_file_user_id_created_at_id', table_name='audio_file')
+    op.drop_index('ix_audio_file_user_id_id', table_name='audio_file')
+    op.drop_column('audio_file', 'created_at')
+    op.drop_column('audio_file', 'duration')
+    op.drop_column('audio_file', 'format')
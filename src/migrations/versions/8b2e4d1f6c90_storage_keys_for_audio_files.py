@@ -0,0 +1,39 @@
+"""Storage keys for audio files
+
+Revision ID: 8b2e4d1f6c90
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 12:40:05.513227
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d1f6c90'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEGACY_PREFIX = 'src/static/'
+
+
+def upgrade() -> None:
+    # file_path теперь хранит ключ в хранилище относительно AUDIO_UPLOAD_DIR
+    op.execute(
+        sa.text(
+            "UPDATE audio_file SET file_path = substr(file_path, :start) "
+            "WHERE file_path LIKE :pattern"
+        ).bindparams(start=len(LEGACY_PREFIX) + 1, pattern=LEGACY_PREFIX + '%')
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        sa.text(
+            "UPDATE audio_file SET file_path = :prefix || file_path "
+            "WHERE file_path NOT LIKE '%/%'"
+        ).bindparams(prefix=LEGACY_PREFIX)
+    )
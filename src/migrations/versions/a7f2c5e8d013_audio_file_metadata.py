@@ -0,0 +1,38 @@
+"""Audio file technical metadata
+
+Revision ID: a7f2c5e8d013
+Revises: e1b6c3f8a924
+Create Date: 2026-10-18 18:05:37.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7f2c5e8d013'
+down_revision: Union[str, None] = 'e1b6c3f8a924'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('audio_file', sa.Column('sample_rate', sa.Integer(), nullable=True))
+    op.add_column('audio_file', sa.Column('channels', sa.SmallInteger(), nullable=True))
+    op.add_column('audio_file', sa.Column('bitrate', sa.Integer(), nullable=True))
+    op.add_column('audio_file', sa.Column('codec', sa.String(length=16), nullable=True))
+    op.add_column('audio_file', sa.Column('size', sa.BigInteger(), nullable=True))
+    op.create_index('ix_audio_file_user_id_codec_id', 'audio_file', ['user_id', 'codec', 'id'], unique=False)
+    op.create_index('ix_audio_file_user_id_bitrate', 'audio_file', ['user_id', 'bitrate'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audio_file_user_id_bitrate', table_name='audio_file')
+    op.drop_index('ix_audio_file_user_id_codec_id', table_name='audio_file')
+    op.drop_column('audio_file', 'size')
+    op.drop_column('audio_file', 'codec')
+    op.drop_column('audio_file', 'bitrate')
+    op.drop_column('audio_file', 'channels')
+    op.drop_column('audio_file', 'sample_rate')
@@ -0,0 +1,35 @@
+"""Add user.storage_used
+
+Revision ID: a9e3d5b7c148
+Revises: f2a4b7c9d615
+Create Date: 2026-10-18 21:42:16.507213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e3d5b7c148'
+down_revision: Union[str, None] = 'f2a4b7c9d615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('storage_used', sa.BigInteger(), server_default='0', nullable=False))
+    op.execute(
+        sa.text(
+            'UPDATE "user" SET storage_used = used.total '
+            "FROM (SELECT audio_file.user_id, SUM(audio_blob.size) AS total "
+            "FROM audio_file JOIN audio_blob ON audio_blob.id = audio_file.blob_id "
+            "GROUP BY audio_file.user_id) AS used "
+            'WHERE used.user_id = "user".id'
+        )
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'storage_used')
@@ -0,0 +1,46 @@
+"""Add job queue table
+
+Revision ID: b3d8e6a1f257
+Revises: a7f2c5e8d013
+Create Date: 2026-10-18 18:52:13.560841
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3d8e6a1f257'
+down_revision: Union[str, None] = 'a7f2c5e8d013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'job',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(length=64), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column('status', sa.String(length=16), server_default='queued', nullable=False),
+        sa.Column('priority', sa.SmallInteger(), server_default='0', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('locked_by', sa.String(length=128), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_job_claim', 'job', [sa.text('priority DESC'), 'run_at', 'id'], unique=False, postgresql_where=sa.text("status = 'queued'"))
+    op.create_index('ix_job_running_locked_at', 'job', ['locked_at'], unique=False, postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_running_locked_at', table_name='job', postgresql_where=sa.text("status = 'running'"))
+    op.drop_index('ix_job_claim', table_name='job', postgresql_where=sa.text("status = 'queued'"))
+    op.drop_table('job')
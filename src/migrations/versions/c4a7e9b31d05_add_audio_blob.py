@@ -0,0 +1,42 @@
+"""Add audio_blob
+
+Revision ID: c4a7e9b31d05
+Revises: 8b2e4d1f6c90
+Create Date: 2026-10-18 13:55:17.902214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e9b31d05'
+down_revision: Union[str, None] = '8b2e4d1f6c90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('audio_blob',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('storage_key', sa.String(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_audio_blob_sha256'), 'audio_blob', ['sha256'], unique=True)
+    op.add_column('audio_file', sa.Column('blob_id', sa.Integer(), nullable=True))
+    op.create_index(op.f('ix_audio_file_blob_id'), 'audio_file', ['blob_id'], unique=False)
+    op.create_foreign_key('audio_file_blob_id_fkey', 'audio_file', 'audio_blob', ['blob_id'], ['id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('audio_file_blob_id_fkey', 'audio_file', type_='foreignkey')
+    op.drop_index(op.f('ix_audio_file_blob_id'), table_name='audio_file')
+    op.drop_column('audio_file', 'blob_id')
+    op.drop_index(op.f('ix_audio_blob_sha256'), table_name='audio_blob')
+    op.drop_table('audio_blob')
@@ -0,0 +1,40 @@
+"""Add audio_rendition table
+
+Revision ID: d5c1a9f4e382
+Revises: b3d8e6a1f257
+Create Date: 2026-10-18 19:41:26.018754
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5c1a9f4e382'
+down_revision: Union[str, None] = 'b3d8e6a1f257'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audio_rendition',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('blob_id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=32), nullable=False),
+        sa.Column('codec', sa.String(length=32), nullable=False),
+        sa.Column('bitrate', sa.String(length=16), nullable=False),
+        sa.Column('media_type', sa.String(length=64), nullable=False),
+        sa.Column('storage_key', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['blob_id'], ['audio_blob.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('blob_id', 'name', name='uq_audio_rendition_blob_id_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('audio_rendition')
@@ -0,0 +1,26 @@
+"""Add user.last_visited_at
+
+Revision ID: e1b6c3f8a924
+Revises: 5d93f0a2e7b1
+Create Date: 2026-10-18 16:48:09.115731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1b6c3f8a924'
+down_revision: Union[str, None] = '5d93f0a2e7b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user', sa.Column('last_visited_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('user', 'last_visited_at')
@@ -0,0 +1,34 @@
+"""Plain btree index for sorting audio files by name
+
+Revision ID: e8d2f4a6b913
+Revises: c6f1b8d2e473
+Create Date: 2026-10-18 23:41:12.305917
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8d2f4a6b913'
+down_revision: Union[str, None] = 'c6f1b8d2e473'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        "ALTER INDEX ix_audio_file_user_id_file_name_id "
+        "RENAME TO ix_audio_file_user_id_file_name_pattern"
+    )
+    op.create_index('ix_audio_file_user_id_file_name_id', 'audio_file', ['user_id', 'file_name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_audio_file_user_id_file_name_id', table_name='audio_file')
+    op.execute(
+        "ALTER INDEX ix_audio_file_user_id_file_name_pattern "
+        "RENAME TO ix_audio_file_user_id_file_name_id"
+    )
@@ -0,0 +1,26 @@
+"""Add audio_blob.peaks_key
+
+Revision ID: f2a4b7c9d615
+Revises: d5c1a9f4e382
+Create Date: 2026-10-18 20:27:51.338902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a4b7c9d615'
+down_revision: Union[str, None] = 'd5c1a9f4e382'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('audio_blob', sa.Column('peaks_key', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('audio_blob', 'peaks_key')
@@ -1,5 +1,10 @@
 from .base import Base
 from .user import User
 from .audio_file import AudioFile
+from .audio_blob import AudioBlob
+from .audio_rendition import AudioRendition
+from .upload_session import UploadSession
+from .job import Job
+from .revoked_token import RevokedToken
 
-__all__ = ["Base", "User", "AudioFile"]
\ No newline at end of file
+__all__ = ["Base", "User", "AudioFile", "AudioBlob", "AudioRendition", "UploadSession", "Job", "RevokedToken"]
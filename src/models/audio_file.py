@@ -1,4 +1,7 @@
-from sqlalchemy import Integer, String, ForeignKey
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, Float, Index, Integer, SmallInteger, String, ForeignKey, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base
@@ -6,14 +9,45 @@ from .base import Base
 
 class AudioFile(Base):
     __tablename__ = "audio_file"
+    __table_args__ = (
+        Index("ix_audio_file_user_id_id", "user_id", "id"),
+        Index("ix_audio_file_user_id_created_at_id", "user_id", "created_at", "id"),
+        # Сортировка по имени идёт в collation столбца и требует обычного
+        # btree; text_pattern_ops годится только для поиска по префиксу.
+        Index("ix_audio_file_user_id_file_name_id", "user_id", "file_name", "id"),
+        Index(
+            "ix_audio_file_user_id_file_name_pattern",
+            "user_id",
+            "file_name",
+            "id",
+            postgresql_ops={"file_name": "text_pattern_ops"},
+        ),
+        Index("ix_audio_file_user_id_format_id", "user_id", "format", "id"),
+        Index("ix_audio_file_user_id_duration", "user_id", "duration"),
+        Index("ix_audio_file_user_id_codec_id", "user_id", "codec", "id"),
+        Index("ix_audio_file_user_id_bitrate", "user_id", "bitrate"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("user.id"))
     file_name: Mapped[str] = mapped_column(String, nullable=False)
     file_path: Mapped[str] = mapped_column(String, nullable=False)
+    blob_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("audio_blob.id"), index=True, nullable=True
+    )
+    format: Mapped[Optional[str]] = mapped_column(String(8), nullable=True)
+    duration: Mapped[Optional[float]] = mapped_column(Float, nullable=True)  # seconds
+    sample_rate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # Hz
+    channels: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    bitrate: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)  # bits per second
+    codec: Mapped[Optional[str]] = mapped_column(String(16), nullable=True)
+    size: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)  # bytes
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
 
     user: Mapped["User"] = relationship(
         "User",
         back_populates="audio_files",
-        lazy="selectin"
-    )
\ No newline at end of file
+        lazy="raise"
+    )
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Integer, String, UniqueConstraint, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class AudioRendition(Base):
+    """Перекодированная версия содержимого для отдачи клиентам.
+
+    Рендишны привязаны к blob'у, а не к файлу пользователя: одинаковое
+    содержимое перекодируется один раз.
+    """
+
+    __tablename__ = "audio_rendition"
+    __table_args__ = (
+        UniqueConstraint("blob_id", "name", name="uq_audio_rendition_blob_id_name"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    blob_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("audio_blob.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(String(32), nullable=False)
+    codec: Mapped[str] = mapped_column(String(32), nullable=False)
+    bitrate: Mapped[str] = mapped_column(String(16), nullable=False)
+    media_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    storage_key: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import List, Optional
 import uuid
-from sqlalchemy import Boolean, Integer, String
+from sqlalchemy import BigInteger, Boolean, DateTime, Integer, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import expression
@@ -20,10 +21,13 @@ class User(Base):
     email: Mapped[str] = mapped_column(String, unique=True, index=True)
     hashed_password: Mapped[str] = mapped_column(String, nullable=True)
     is_superuser: Mapped[bool] = mapped_column(Boolean, server_default=expression.false())
+    last_visited_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Суммарный размер файлов пользователя, ведётся при загрузке.
+    storage_used: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
 
     audio_files: Mapped[List["AudioFile"]] = relationship(
         "AudioFile",
         back_populates="user",
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise"
     )
\ No newline at end of file
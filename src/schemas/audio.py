@@ -1,4 +1,9 @@
-from pydantic import BaseModel
+from datetime import datetime
+from enum import StrEnum
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, Field
 
 class AudioFileBase(BaseModel):
     file_name: str
@@ -11,6 +16,79 @@ class AudioFileCreate(AudioFileBase):
 class AudioFileResponse(AudioFileBase):
     id: int
     user_id: int
+    format: Optional[str] = None
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    bitrate: Optional[int] = None
+    codec: Optional[str] = None
+    size: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AudioRenditionResponse(BaseModel):
+    name: str
+    codec: str
+    bitrate: str
+    media_type: str
+    size: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class AudioFileSort(StrEnum):
+    id = "id"
+    created_at = "created_at"
+    file_name = "file_name"
+
+class SortOrder(StrEnum):
+    asc = "asc"
+    desc = "desc"
+
+class AudioFileFilter(BaseModel):
+    name_prefix: Optional[str] = None
+    format: Optional[str] = None
+    min_duration: Optional[float] = None
+    max_duration: Optional[float] = None
+    codec: Optional[str] = None
+    min_bitrate: Optional[int] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class AudioFilePage(BaseModel):
+    items: list[AudioFileResponse]
+    next_cursor: Optional[str] = None
+
+class UploadCheckRequest(BaseModel):
+    file_name: str
+    filename: Optional[str] = None
+    sha256: str = Field(..., pattern=r"^[0-9a-fA-F]{64}$")
+    size: int = Field(..., gt=0)
+
+class UploadCheckResponse(BaseModel):
+    upload_required: bool
+    message: str
+    file_id: Optional[int] = None
+    file_name: Optional[str] = None
+    file_path: Optional[str] = None
+
+class UploadSessionCreate(BaseModel):
+    file_name: str
+    filename: str
+    content_type: str
+    total_size: int = Field(..., gt=0)
+
+class UploadSessionResponse(BaseModel):
+    id: UUID
+    chunk_size: int
+    total_size: int
+    total_chunks: int
+    received_chunks: list[int]
+    expires_at: datetime
+
+class UploadChunkResponse(BaseModel):
+    index: int
+    offset: int
+    size: int
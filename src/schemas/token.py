@@ -1,3 +1,5 @@
+from dataclasses import dataclass
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel
@@ -21,6 +23,13 @@ class TokenAccessRefresh(BaseModel):
 class TokenPayload(BaseModel):
     uid: UUID
 
+@dataclass(frozen=True, slots=True)
+class VerifiedToken:
+    """Проверенный JWT: владелец, идентификатор и срок (unix time)."""
+    user: TokenPayload
+    jti: Optional[str]
+    expires_at: float
+
 class AuthURLResponse(BaseModel):
     url: str
 
@@ -1,4 +1,5 @@
 import re
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Union, Optional
 from uuid import UUID
@@ -40,6 +41,11 @@ class UserResponse(UserBase):
     username: Optional[str] = None
 
 
+class UserPage(BaseModel):
+    items: list[UserResponse]
+    next_cursor: Optional[str] = None
+
+
 class UserCreateDB(UserBase):
     uid: UUID
     hashed_password: str
@@ -59,4 +65,25 @@ class UserSuperuserUpdate(BaseModel):
     is_superuser: bool
 
 class UserDelete(BaseModel):
-    user_id: int
\ No newline at end of file
+    user_id: int
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """Неизменяемый снимок пользователя для кэша авторизации."""
+    id: int
+    uid: UUID
+    username: str
+    email: str
+    is_superuser: bool
+    yandex_id: Optional[int] = None
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            uid=user.uid,
+            username=user.username,
+            email=user.email,
+            is_superuser=user.is_superuser,
+            yandex_id=user.yandex_id,
+        )
\ No newline at end of file
@@ -1,71 +1,138 @@
+import hashlib
 import os
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import AsyncIterator, Optional
+from uuid import uuid4
 from fastapi import UploadFile, HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.conf import audio_settings, transcode_settings, waveform_settings
 from src.crud.audio import CRUDAudio
-from src.models import User
+from src.crud.user import crud_user
+from src.models import AudioBlob, AudioFile, AudioRendition
+from src.schemas.audio import AudioFileFilter, AudioFileSort, SortOrder, UploadCheckRequest
+from src.schemas.user import UserSnapshot
+from src.services.audio_metadata import probe_audio
+from src.services.audio_sniffer import AudioSniffer
+from src.services.audio_stream import accept_quality, guess_media_type, parse_accept
+from src.services.jobs import enqueue_job
+from src.services.pagination import decode_cursor, encode_cursor
+from src.services.transcode import TranscodeError, decode_pcm, transcode
+from src.services.waveform import (
+    PeakAccumulator, build_levels, encode_waveform, peaks_version, read_peaks
+)
+from src.storage import LocalStorage, StorageBackend, content_key, get_storage
+EXTRACT_METADATA = "extract_metadata"
+TRANSCODE = "transcode"
+GENERATE_PEAKS = "generate_peaks"
+ORIGINAL_RENDITION = "original"
 
 
 class AudioService:
-    def __init__(self, session: AsyncSession):
+    def __init__(self, session: AsyncSession, storage: Optional[StorageBackend] = None):
+        self.session = session
         self.crud = CRUDAudio(session)
-        self.upload_dir = Path("src/static")
+        self.storage = storage or get_storage()
+        # Содержимое, перенесённое под свой ключ в незафиксированной
+        # транзакции: (sha256, ключ). См. ``discard_new_content``.
+        self.new_content: list[tuple[str, str]] = []
+        self.chunk_size = audio_settings.AUDIO_UPLOAD_CHUNK_SIZE
+        self.max_size = audio_settings.AUDIO_UPLOAD_MAX_SIZE
         self.allowed_types = [
             'audio/mpeg', 'audio/wav', 'audio/x-wav',
             'audio/aac', 'audio/ogg', 'audio/x-m4a'
         ]
         self.allowed_extensions = ['.mp3', '.wav', '.aac', '.ogg', '.m4a']
 
-    async def validate_audio_file(self, file: UploadFile):
-        audio_signatures = {
-            b'ID3': 'audio/mpeg',
-            b'RIFF': 'audio/wav',
-            b'OggS': 'audio/ogg',
-        }
-        header = file.file.read(4)
-        file.file.seek(0)
-        for signature, mime in audio_signatures.items():
-            if header.startswith(signature):
-                if file.content_type != mime:
-                    raise ValueError(f"Файл имеет сигнатуру {mime}, но Content-Type: {file.content_type}")
-                return
-        raise ValueError("Файл не является валидным аудио")
-
-    async def upload_audio(
-            self,
-            user: User,
-            file_name: str,
-            file: UploadFile
-    ) -> dict:
-        if file.content_type not in self.allowed_types:
+    def check_type(self, content_type: Optional[str], filename: str):
+        if content_type not in self.allowed_types:
             raise HTTPException(
                 status_code=400,
                 detail=f"Недопустимый тип файла. Разрешены: {', '.join(self.allowed_types)}"
             )
-
-        try:
-            await self.validate_audio_file(file)
-        except ValueError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-
-        file_ext = os.path.splitext(file.filename)[1].lower()
+        file_ext = os.path.splitext(filename)[1].lower()
         if file_ext not in self.allowed_extensions:
             raise HTTPException(
                 status_code=400,
                 detail=f"Недопустимое расширение файла. Разрешены: {', '.join(self.allowed_extensions)}"
             )
 
-        self.upload_dir.mkdir(exist_ok=True)
-        file_path = self.upload_dir / f"{user.id}_{file_name}"
+    @staticmethod
+    def file_format(filename: Optional[str]) -> Optional[str]:
+        if not filename:
+            return None
+        return os.path.splitext(filename)[1].lower().lstrip(".") or None
 
-        with open(file_path, "wb") as buffer:
-            buffer.write(await file.read())
+    async def upload_audio(
+            self,
+            user: UserSnapshot,
+            file_name: str,
+            file: UploadFile
+    ) -> dict:
+        self.check_type(file.content_type, file.filename)
+
+        if file.size is not None and file.size > self.max_size:
+            raise self._too_large(self.max_size)
 
-        audio_file = await self.crud.create_audio_file(
-            user_id=user.id,
-            file_name=file_name,
-            file_path=str(file_path)
+        blob = await self.store_content(user, self.iter_upload(file), file.content_type)
+        return await self.register_file(user, file_name, blob, self.file_format(file.filename))
+
+    async def check_upload(self, user: UserSnapshot, check_data: UploadCheckRequest) -> dict:
+        """Мгновенная загрузка: если содержимое с таким хэшем и размером уже
+        хранится, файл создаётся без передачи байтов.
+
+        Знание хэша фактически даёт доступ к содержимому, поэтому режим
+        можно отключить через ``AUDIO_INSTANT_UPLOAD_ENABLED``.
+        """
+        if not audio_settings.AUDIO_INSTANT_UPLOAD_ENABLED:
+            return {"upload_required": True, "message": "Instant upload is disabled"}
+
+        blob = await self.crud.acquire_blob(check_data.sha256.lower(), size=check_data.size)
+        if not blob:
+            return {"upload_required": True, "message": "Content is unknown, upload required"}
+        await self.charge_storage(user, blob.size)
+
+        registered = await self.register_file(
+            user, check_data.file_name, blob, self.file_format(check_data.filename)
         )
+        return {**registered, "upload_required": False}
+
+    async def register_file(
+            self,
+            user: UserSnapshot,
+            file_name: str,
+            blob: AudioBlob,
+            file_format: Optional[str] = None,
+    ) -> dict:
+        """Создаёт запись файла для сохранённого содержимого.
+
+        Метаданные уже разобранного содержимого копируются сразу, иначе
+        их извлечение ставится в очередь задач в той же транзакции —
+        ответ не ждёт чтения заголовков из хранилища.
+        """
+        try:
+            metadata = await self.crud.get_blob_metadata(blob.id)
+            audio_file = await self.crud.create_audio_file(
+                user_id=user.id,
+                file_name=file_name,
+                file_path=blob.storage_key,
+                blob_id=blob.id,
+                format=file_format,
+                metadata=metadata,
+                commit=False,
+            )
+            if metadata is None:
+                await enqueue_job(
+                    self.session, EXTRACT_METADATA, {"audio_file_id": audio_file.id}, priority=10
+                )
+            await self.session.commit()
+        except BaseException:
+            await self.discard_new_content()
+            raise
+        self.new_content.clear()
         return {
             "message": "File uploaded successfully",
             "file_id": audio_file.id,
@@ -73,5 +140,374 @@ class AudioService:
             "file_path": audio_file.file_path
         }
 
-    async def get_user_files(self, user: User) -> list:
-        return await self.crud.get_user_audio_files(user.id)
\ No newline at end of file
+    async def extract_metadata(self, file_id: int) -> None:
+        """Заполняет технические метаданные файла по заголовкам контейнера.
+
+        Нераспознанный формат не считается ошибкой — поля остаются пустыми.
+        Ошибки чтения из хранилища пробрасываются, чтобы задача повторилась.
+        """
+        blob = await self.crud.get_audio_file_blob(file_id)
+        if blob is None:
+            return
+        metadata = await probe_audio(self.storage, blob.storage_key, blob.size)
+        await self.crud.update_audio_metadata(file_id, **metadata.as_columns())
+
+    async def enqueue_processing(self, blob: AudioBlob) -> None:
+        """Ставит в очередь обработку нового содержимого: пики и рендишны."""
+        await enqueue_job(self.session, GENERATE_PEAKS, {"blob_id": blob.id}, priority=5)
+        for name in transcode_settings.AUDIO_RENDITIONS:
+            await enqueue_job(self.session, TRANSCODE, {"blob_id": blob.id, "rendition": name})
+
+    @asynccontextmanager
+    async def local_workspace(self, blob: AudioBlob) -> AsyncIterator[tuple[Path, LocalStorage]]:
+        """Временный каталог и путь к содержимому на локальном диске для ffmpeg.
+
+        Если хранилище локальное, файл читается на месте, иначе сначала
+        скачивается во временный каталог.
+        """
+        with tempfile.TemporaryDirectory(prefix="audio-") as workdir:
+            workspace = LocalStorage(workdir, self.chunk_size)
+            source = self.storage.local_path(blob.storage_key)
+            if source is None:
+                await workspace.put("source", self.storage.stream(blob.storage_key, 0, blob.size - 1))
+                source = workspace.local_path("source")
+            yield source, workspace
+
+    async def create_rendition(self, blob_id: int, name: str) -> None:
+        """Перекодирует содержимое в рендишн ``name`` и сохраняет результат
+        рядом с оригиналом. Повторный запуск просто перезаписывает рендишн."""
+        spec = transcode_settings.AUDIO_RENDITIONS.get(name)
+        blob = await self.crud.get_blob(blob_id)
+        if spec is None or blob is None:
+            return
+
+        key = f"renditions/{content_key(blob.sha256)}/{name}.{spec.extension}"
+        async with self.local_workspace(blob) as (source, workspace):
+            await transcode(source, workspace.local_path("target"), spec)
+            target = await workspace.stat("target")
+            if target is None or target.size == 0:
+                raise TranscodeError("ffmpeg не создал выходной файл")
+            stored = await self.storage.put(key, workspace.stream("target", 0, target.size - 1))
+
+        try:
+            await self.crud.create_rendition(
+                blob_id=blob.id,
+                name=name,
+                codec=spec.codec,
+                bitrate=spec.bitrate,
+                media_type=spec.media_type,
+                storage_key=key,
+                size=stored.size,
+            )
+        except IntegrityError:
+            # blob удалили, пока шло перекодирование.
+            await self.session.rollback()
+            await self.storage.delete(key)
+
+    async def generate_peaks(self, blob_id: int) -> None:
+        """Декодирует содержимое один раз и сохраняет многоуровневые пики."""
+        blob = await self.crud.get_blob(blob_id)
+        if blob is None:
+            return
+
+        accumulator = PeakAccumulator(waveform_settings.PEAKS_BLOCK_SIZE)
+        async with self.local_workspace(blob) as (source, _):
+            async for pcm in decode_pcm(source, waveform_settings.PEAKS_SAMPLE_RATE):
+                accumulator.feed(pcm)
+        levels = build_levels(accumulator.finish(), waveform_settings.PEAKS_MIN_LEVEL_SIZE)
+        data = encode_waveform(
+            levels,
+            bits=waveform_settings.PEAKS_BITS,
+            sample_rate=waveform_settings.PEAKS_SAMPLE_RATE,
+            block_size=waveform_settings.PEAKS_BLOCK_SIZE,
+            total_samples=accumulator.total_samples,
+        )
+
+        async def chunks():
+            yield data
+
+        version = peaks_version(
+            waveform_settings.PEAKS_SAMPLE_RATE,
+            waveform_settings.PEAKS_BLOCK_SIZE,
+            waveform_settings.PEAKS_BITS,
+            waveform_settings.PEAKS_MIN_LEVEL_SIZE,
+        )
+        key = f"peaks/{content_key(blob.sha256)}-{version}.bin"
+        previous = blob.peaks_key
+        await self.storage.put(key, chunks())
+        if not await self.crud.set_blob_peaks(blob.id, key):
+            await self.storage.delete(key)
+        elif previous and previous != key:
+            await self.storage.delete(previous)
+
+    async def get_peaks_blob(self, user: UserSnapshot, file_id: int) -> AudioBlob:
+        audio_file = await self.get_user_file(user, file_id)
+        blob = None
+        if audio_file.blob_id is not None:
+            blob = await self.crud.get_blob(audio_file.blob_id)
+        if blob is None or blob.peaks_key is None:
+            raise HTTPException(status_code=404, detail="Пики для файла ещё не готовы")
+        return blob
+
+    async def get_peaks(self, blob: AudioBlob, resolution: int) -> dict:
+        header, pairs = await read_peaks(self.storage, blob.peaks_key, resolution)
+        return {
+            "bits": header.bits,
+            "duration": header.duration,
+            "resolution": len(pairs) // 2,
+            "samples_per_peak": header.total_samples / max(len(pairs) // 2, 1),
+            "sample_rate": header.sample_rate,
+            "data": pairs,
+        }
+
+    async def get_renditions(self, user: UserSnapshot, file_id: int) -> list[AudioRendition]:
+        audio_file = await self.get_user_file(user, file_id)
+        if audio_file.blob_id is None:
+            return []
+        return await self.crud.get_renditions(audio_file.blob_id)
+
+    async def select_rendition(
+            self,
+            audio_file: AudioFile,
+            requested: Optional[str] = None,
+            accept: Optional[str] = None,
+    ) -> Optional[AudioRendition]:
+        """Выбирает, что отдавать: рендишн или оригинал (``None``).
+
+        Явно запрошенный рендишн отдаётся или даёт 404. Иначе решает
+        ``Accept``: рендишн выбирается, только если его тип назван явно
+        (``*/*`` и ``audio/*`` его не выбирают) и клиент ценит его не меньше
+        оригинала. Из равноценных берётся самый компактный, и никогда —
+        больше оригинала.
+        """
+        if requested == ORIGINAL_RENDITION or (not requested and not accept):
+            return None
+        renditions = []
+        if audio_file.blob_id is not None:
+            renditions = await self.crud.get_renditions(audio_file.blob_id)
+        if requested:
+            for rendition in renditions:
+                if rendition.name == requested:
+                    return rendition
+            raise HTTPException(status_code=404, detail="Рендишн не найден или ещё не готов")
+
+        accepted = parse_accept(accept)
+        candidates = [
+            rendition for rendition in renditions
+            if accepted.get(rendition.media_type, 0) > 0
+            and (audio_file.size is None or rendition.size < audio_file.size)
+        ]
+        if not candidates:
+            return None
+        best = max(candidates, key=lambda r: (accepted[r.media_type], -r.size))
+        original_type = guess_media_type(audio_file.file_name, audio_file.file_path)
+        if accepted[best.media_type] >= accept_quality(accepted, original_type):
+            return best
+        return None
+
+    async def iter_upload(self, file: UploadFile) -> AsyncIterator[bytes]:
+        while chunk := await file.read(self.chunk_size):
+            yield chunk
+
+    async def store_content(
+            self,
+            user: UserSnapshot,
+            chunks: AsyncIterator[bytes],
+            content_type: Optional[str],
+            max_size: Optional[int] = None,
+    ) -> AudioBlob:
+        """Сохраняет поток в хранилище с дедупликацией по SHA-256.
+
+        Хэш считается и формат проверяется на лету, пока данные пишутся во
+        временный ключ: невалидный файл отбрасывается сразу после окна
+        определения формата, обрезанный — по окончании потока. Размер
+        списывается с квоты пользователя до переноса в хранилище. Если
+        такое содержимое уже хранится, временная копия удаляется и у blob'а
+        увеличивается счётчик ссылок; иначе копия переносится под ключ,
+        вычисленный из хэша. Всё это — под блокировкой содержимого
+        (``lock_content``), которая держится до commit в ``register_file``
+        вместе с созданием записи файла. Если транзакция не зафиксируется,
+        новое содержимое удаляет ``discard_new_content``.
+        """
+        max_size = self.max_size if max_size is None else max_size
+        hasher = hashlib.sha256()
+        staging_key = f"tmp/{uuid4().hex}"
+        stored = await self.storage.put(
+            staging_key,
+            self.hash_stream(
+                self.sniff_stream(self.limit_stream(chunks, max_size), AudioSniffer(content_type)),
+                hasher,
+            ),
+        )
+        digest = hasher.hexdigest()
+
+        try:
+            await self.charge_storage(user, stored.size)
+            await self.crud.lock_content(digest)
+            blob = await self.crud.acquire_blob(digest)
+            if blob is None:
+                key = content_key(digest)
+                blob = await self.crud.create_blob(digest, stored.size, key)
+                if blob is None:
+                    blob = await self.crud.acquire_blob(digest)
+                else:
+                    await self.storage.move(staging_key, key)
+                    staging_key = None
+                    self.new_content.append((digest, key))
+                    await self.enqueue_processing(blob)
+        except BaseException:
+            await self.discard_new_content()
+            raise
+        finally:
+            if staging_key is not None:
+                await self.storage.delete(staging_key)
+        return blob
+
+    async def discard_new_content(self) -> None:
+        """Откатывает транзакцию и удаляет содержимое, которое
+        ``store_content`` перенёс под свой ключ в этой транзакции: blob'а
+        после отката нет, и объект остался бы без ссылок. Удаление идёт
+        через ``delete_content`` — под блокировкой и только если blob с тем
+        же хэшем не успели создать заново."""
+        await self.session.rollback()
+        keys, self.new_content = self.new_content, []
+        await self.delete_content(keys)
+
+    @staticmethod
+    async def hash_stream(chunks: AsyncIterator[bytes], hasher) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            hasher.update(chunk)
+            yield chunk
+
+    @staticmethod
+    async def sniff_stream(
+            chunks: AsyncIterator[bytes],
+            sniffer: AudioSniffer,
+            finish: bool = True,
+    ) -> AsyncIterator[bytes]:
+        async for chunk in chunks:
+            sniffer.feed(chunk)
+            yield chunk
+        if finish:
+            sniffer.finish()
+
+    async def limit_stream(
+            self,
+            chunks: AsyncIterator[bytes],
+            max_size: int,
+    ) -> AsyncIterator[bytes]:
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_size:
+                raise self._too_large(max_size)
+            yield chunk
+
+    async def check_quota(self, user: UserSnapshot, size: int) -> None:
+        """Предварительная проверка квоты до приёма байтов. Окончательно
+        квота проверяется в ``charge_storage``."""
+        quota = audio_settings.AUDIO_USER_QUOTA
+        if quota and await crud_user.get_storage_used(self.session, user_id=user.id) + size > quota:
+            raise self._quota_exceeded(quota)
+
+    async def charge_storage(self, user: UserSnapshot, size: int) -> None:
+        quota = audio_settings.AUDIO_USER_QUOTA
+        if not await crud_user.charge_storage(self.session, user_id=user.id, size=size, quota=quota):
+            raise self._quota_exceeded(quota)
+
+    @staticmethod
+    def _quota_exceeded(quota: int) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Превышена квота хранилища {quota} байт"
+        )
+
+    @staticmethod
+    def _too_large(max_size: int) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Файл превышает допустимый размер {max_size} байт"
+        )
+
+    async def release_user_files(self, user_id: int) -> list[tuple[Optional[str], str]]:
+        return await self.crud.release_user_audio_files(user_id)
+
+    async def delete_content(self, keys: list[tuple[Optional[str], str]]) -> None:
+        """Удаляет из хранилища объекты, освобождённые после commit.
+
+        Содержимое с тем же хэшем могли загрузить заново, пока шло удаление:
+        под блокировкой содержимого объекты удаляются, только если blob'а
+        с этим хэшем снова нет.
+        """
+        by_hash: dict[str, list[str]] = {}
+        for sha256, key in keys:
+            if sha256 is None:
+                await self.storage.delete(key)
+            else:
+                by_hash.setdefault(sha256, []).append(key)
+        for sha256, hash_keys in by_hash.items():
+            try:
+                await self.crud.lock_content(sha256)
+                if not await self.crud.blob_exists(sha256):
+                    for key in hash_keys:
+                        await self.storage.delete(key)
+            finally:
+                await self.session.commit()
+
+    async def get_user_files(
+            self,
+            user: UserSnapshot,
+            filters: Optional[AudioFileFilter] = None,
+            sort: AudioFileSort = AudioFileSort.id,
+            order: SortOrder = SortOrder.desc,
+            cursor: Optional[str] = None,
+            limit: Optional[int] = None,
+    ) -> dict:
+        limit = min(limit or audio_settings.AUDIO_LIST_DEFAULT_LIMIT, audio_settings.AUDIO_LIST_MAX_LIMIT)
+        after = self._parse_cursor(cursor, sort) if cursor else None
+        files = await self.crud.get_user_audio_files(
+            user.id,
+            filters=filters,
+            sort=sort,
+            order=order,
+            after=after,
+            limit=limit + 1,
+        )
+        next_cursor = None
+        if len(files) > limit:
+            files = files[:limit]
+            last = files[-1]
+            next_cursor = encode_cursor(getattr(last, sort.value), last.id)
+        return {"items": files, "next_cursor": next_cursor}
+
+    @staticmethod
+    def _parse_cursor(cursor: str, sort: AudioFileSort) -> tuple:
+        """Разбирает курсор и проверяет типы значений: курсор приходит от
+        клиента, и значение не того типа не должно доходить до БД."""
+        values = decode_cursor(cursor)
+        try:
+            value, last_id = values
+            if not AudioService._is_int4(last_id):
+                raise ValueError
+            if sort == AudioFileSort.created_at:
+                value = datetime.fromisoformat(value)
+                if value.tzinfo is None:
+                    raise ValueError
+            elif sort == AudioFileSort.file_name:
+                if not isinstance(value, str):
+                    raise ValueError
+            elif not AudioService._is_int4(value):
+                raise ValueError
+            return value, last_id
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+
+    @staticmethod
+    def _is_int4(value) -> bool:
+        return type(value) is int and -2 ** 31 <= value < 2 ** 31
+
+    async def get_user_file(self, user: UserSnapshot, file_id: int) -> AudioFile:
+        audio_file = await self.crud.get_user_audio_file(file_id, user.id)
+        if not audio_file:
+            raise HTTPException(status_code=404, detail="Файл не найден")
+        return audio_file
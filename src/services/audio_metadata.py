@@ -0,0 +1,402 @@
+"""Извлечение метаданных аудио по заголовкам контейнера.
+
+Парсеры читают из хранилища только нужные диапазоны байт: начало файла,
+заголовки чанков/атомов и, для Ogg, хвост с последней страницей. Файл
+целиком не загружается ни для одного формата.
+"""
+import logging
+import struct
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Optional
+
+from src.storage import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+HEAD_SIZE = 64 * 1024
+TAIL_SIZE = 64 * 1024
+MAX_MOOV_SIZE = 16 * 1024 * 1024
+
+ReadRange = Callable[[int, int], Awaitable[bytes]]
+
+
+@dataclass
+class AudioMetadata:
+    size: int
+    codec: Optional[str] = None
+    duration: Optional[float] = None  # seconds
+    sample_rate: Optional[int] = None  # Hz
+    channels: Optional[int] = None
+    bitrate: Optional[int] = None  # bits per second
+
+    def as_columns(self) -> dict:
+        data = asdict(self)
+        if self.bitrate is None and self.duration:
+            data["bitrate"] = int(self.size * 8 / self.duration)
+        return data
+
+
+async def probe_audio(storage: StorageBackend, key: str, size: int) -> AudioMetadata:
+    """Определяет контейнер по первым байтам и разбирает его заголовки.
+
+    Неизвестный или повреждённый файл не считается ошибкой — возвращаются
+    те поля, которые удалось определить (как минимум размер).
+    """
+
+    async def read(offset: int, length: int) -> bytes:
+        if offset >= size or length <= 0:
+            return b""
+        return await storage.read_range(key, offset, min(length, size - offset))
+
+    head = await read(0, HEAD_SIZE)
+    try:
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            return await parse_wav(read, head, size)
+        if head[:4] == b"OggS":
+            return await parse_ogg(read, head, size)
+        if head[4:8] == b"ftyp":
+            return await parse_mp4(read, size)
+        audio_start = id3v2_size(head)
+        if audio_start:
+            head = await read(audio_start, HEAD_SIZE)
+        if is_adts_header(head):
+            return parse_adts(head, size - audio_start)
+        return parse_mpeg(head, size, audio_start)
+    except (struct.error, ValueError, ZeroDivisionError) as e:
+        logger.info("Не удалось разобрать заголовки %s: %s", key, e)
+        return AudioMetadata(size=size)
+
+
+# --- WAV ---------------------------------------------------------------------
+
+WAVE_CODECS = {1: "pcm", 3: "pcm_float", 6: "alaw", 7: "mulaw", 0x55: "mp3"}
+
+
+async def parse_wav(read: ReadRange, head: bytes, size: int) -> AudioMetadata:
+    metadata = AudioMetadata(size=size, codec="pcm")
+    byte_rate = data_size = None
+    offset = 12
+    while offset + 8 <= size:
+        header = head[offset:offset + 8] if offset + 8 <= len(head) else await read(offset, 8)
+        if len(header) < 8:
+            break
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            body = await read(offset + 8, min(chunk_size, 40))
+            fmt_tag, channels, sample_rate, byte_rate = struct.unpack("<HHII", body[:12])
+            if fmt_tag == 0xFFFE and len(body) >= 26:
+                # WAVE_FORMAT_EXTENSIBLE: настоящий тег — в начале SubFormat GUID.
+                fmt_tag = struct.unpack("<H", body[24:26])[0]
+            metadata.codec = WAVE_CODECS.get(fmt_tag, "wav")
+            metadata.channels = channels
+            metadata.sample_rate = sample_rate
+            metadata.bitrate = byte_rate * 8
+        elif chunk_id == b"data":
+            # Файл мог быть записан потоково с заглушкой вместо размера.
+            data_size = min(chunk_size, size - offset - 8)
+            break
+        offset += 8 + chunk_size + (chunk_size & 1)
+
+    if byte_rate and data_size is not None:
+        metadata.duration = data_size / byte_rate
+    return metadata
+
+
+# --- MPEG audio (MP1/MP2/MP3) -----------------------------------------------
+
+MPEG_BITRATES = {
+    # (версия MPEG-1?, слой) -> кбит/с по индексу
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),   # MPEG-2.5
+}
+
+
+@dataclass
+class MpegFrame:
+    mpeg1: bool
+    layer: int
+    bitrate: int  # bits per second
+    sample_rate: int
+    channels: int
+    length: int  # bytes
+    samples: int
+
+
+def id3v2_size(data: bytes) -> int:
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def parse_mpeg_frame(header: bytes) -> Optional[MpegFrame]:
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = MPEG_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    channels = 1 if header[3] >> 6 == 3 else 2
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+    return MpegFrame(mpeg1, layer, bitrate, sample_rate, channels, length, samples)
+
+
+def find_mpeg_frame(data: bytes) -> tuple[int, Optional[MpegFrame]]:
+    """Ищет первый кадр, за которым сразу следует ещё один кадр — одиночное
+    совпадение синхрослова внутри мусора так не пройдёт."""
+    position = data.find(b"\xff")
+    while 0 <= position < len(data) - 4:
+        frame = parse_mpeg_frame(data[position:position + 4])
+        if frame:
+            following = data[position + frame.length:position + frame.length + 4]
+            if len(following) < 4 or parse_mpeg_frame(following):
+                return position, frame
+        position = data.find(b"\xff", position + 1)
+    return -1, None
+
+
+def parse_mpeg(head: bytes, size: int, audio_start: int) -> AudioMetadata:
+    position, frame = find_mpeg_frame(head)
+    if frame is None:
+        return AudioMetadata(size=size)
+    metadata = AudioMetadata(
+        size=size,
+        codec=f"mp{frame.layer}",
+        sample_rate=frame.sample_rate,
+        channels=frame.channels,
+    )
+    audio_size = size - audio_start - position
+
+    frames, vbr_bytes = vbr_header(head[position:position + frame.length], frame)
+    if frames:
+        metadata.duration = frames * frame.samples / frame.sample_rate
+        metadata.bitrate = int((vbr_bytes or audio_size) * 8 / metadata.duration)
+    else:
+        metadata.bitrate = frame.bitrate
+        metadata.duration = audio_size * 8 / frame.bitrate
+    return metadata
+
+
+def vbr_header(data: bytes, frame: MpegFrame) -> tuple[Optional[int], Optional[int]]:
+    """Разбирает заголовок Xing/Info или VBRI из первого кадра."""
+    if frame.mpeg1:
+        side_info = 17 if frame.channels == 1 else 32
+    else:
+        side_info = 9 if frame.channels == 1 else 17
+    xing = 4 + side_info
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", data[xing + 4:xing + 8])[0]
+        offset = xing + 8
+        frames = vbr_bytes = None
+        if flags & 0x01:
+            frames = struct.unpack(">I", data[offset:offset + 4])[0]
+            offset += 4
+        if flags & 0x02:
+            vbr_bytes = struct.unpack(">I", data[offset:offset + 4])[0]
+        return frames, vbr_bytes
+    if data[36:40] == b"VBRI":
+        vbr_bytes, frames = struct.unpack(">II", data[46:54])
+        return frames, vbr_bytes
+    return None, None
+
+
+# --- AAC (ADTS) --------------------------------------------------------------
+
+ADTS_SAMPLE_RATES = (
+    96000, 88200, 64000, 48000, 44100, 32000, 24000,
+    22050, 16000, 12000, 11025, 8000, 7350,
+)
+
+
+def is_adts_header(data: bytes) -> bool:
+    return len(data) >= 7 and data[0] == 0xFF and data[1] & 0xF6 == 0xF0
+
+
+def parse_adts(head: bytes, size: int) -> AudioMetadata:
+    """ADTS не хранит длительность, поэтому она оценивается по средней длине
+    кадров в прочитанном начале файла (1024 сэмпла на кадр)."""
+    rate_index = (head[2] >> 2) & 0x0F
+    if rate_index >= len(ADTS_SAMPLE_RATES):
+        raise ValueError("некорректная частота дискретизации ADTS")
+    sample_rate = ADTS_SAMPLE_RATES[rate_index]
+    channels = ((head[2] & 0x01) << 2) | (head[3] >> 6)
+
+    offset = frames = 0
+    while offset + 7 <= len(head) and is_adts_header(head[offset:offset + 7]):
+        length = ((head[offset + 3] & 0x03) << 11) | (head[offset + 4] << 3) | (head[offset + 5] >> 5)
+        if length < 7 or offset + length > len(head):
+            break
+        blocks = (head[offset + 6] & 0x03) + 1
+        frames += blocks
+        offset += length
+
+    metadata = AudioMetadata(size=size, codec="aac", sample_rate=sample_rate, channels=channels or None)
+    if frames and offset:
+        duration_read = frames * 1024 / sample_rate
+        metadata.bitrate = int(offset * 8 / duration_read)
+        metadata.duration = size * 8 / metadata.bitrate
+    return metadata
+
+
+# --- Ogg (Vorbis/Opus/FLAC) --------------------------------------------------
+
+OGG_HEADER = struct.Struct("<4sBBqIIIB")
+
+
+async def parse_ogg(read: ReadRange, head: bytes, size: int) -> AudioMetadata:
+    _, _, _, _, serial, _, _, segments = OGG_HEADER.unpack_from(head)
+    packet = head[OGG_HEADER.size + segments:]
+    metadata = AudioMetadata(size=size)
+    granule_rate = pre_skip = None
+
+    if packet[:7] == b"\x01vorbis":
+        channels, sample_rate, _, nominal = struct.unpack("<BIiI", packet[11:24])
+        metadata.codec = "vorbis"
+        metadata.channels, metadata.sample_rate = channels, sample_rate
+        metadata.bitrate = nominal or None
+        granule_rate, pre_skip = sample_rate, 0
+    elif packet[:8] == b"OpusHead":
+        channels, pre_skip, sample_rate = struct.unpack("<BHI", packet[9:16])
+        metadata.codec = "opus"
+        metadata.channels = channels
+        metadata.sample_rate = sample_rate or 48000
+        granule_rate = 48000  # гранулы Opus всегда в 48 кГц
+    elif packet[:5] == b"\x7fFLAC":
+        # Заголовок маппинга (13 байт), заголовок блока (4 байта), затем в
+        # STREAMINFO после 10 байт размеров блоков/кадров идут частота,
+        # число каналов и разрядность.
+        packed = int.from_bytes(packet[27:35], "big")
+        metadata.codec = "flac"
+        metadata.sample_rate = packed >> 44
+        metadata.channels = ((packed >> 41) & 0x07) + 1
+        granule_rate, pre_skip = metadata.sample_rate, 0
+
+    if granule_rate:
+        granule = await last_ogg_granule(read, size, serial)
+        if granule and granule > pre_skip:
+            metadata.duration = (granule - pre_skip) / granule_rate
+    return metadata
+
+
+async def last_ogg_granule(read: ReadRange, size: int, serial: int) -> Optional[int]:
+    tail_start = max(size - TAIL_SIZE, 0)
+    tail = await read(tail_start, TAIL_SIZE)
+    position = tail.rfind(b"OggS")
+    while position >= 0:
+        if position + OGG_HEADER.size <= len(tail):
+            _, _, _, granule, page_serial, _, _, _ = OGG_HEADER.unpack_from(tail, position)
+            if page_serial == serial and granule >= 0:
+                return granule
+        position = tail.rfind(b"OggS", 0, position)
+    return None
+
+
+# --- MP4/M4A (ISO BMFF) ------------------------------------------------------
+
+MP4_CODECS = {b"mp4a": "aac", b"alac": "alac", b"Opus": "opus", b"fLaC": "flac", b"ac-3": "ac3", b"ec-3": "eac3"}
+
+
+async def parse_mp4(read: ReadRange, size: int) -> AudioMetadata:
+    """Находит ``moov`` среди атомов верхнего уровня, читая только их
+    заголовки, и разбирает его целиком (он обычно занимает килобайты)."""
+    metadata = AudioMetadata(size=size)
+    offset = 0
+    while offset + 8 <= size:
+        header = await read(offset, 16)
+        box_size, box_type = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = size - offset
+        if box_size < header_size:
+            break
+        if box_type == b"moov":
+            if box_size > MAX_MOOV_SIZE:
+                raise ValueError("слишком большой атом moov")
+            moov = await read(offset + header_size, box_size - header_size)
+            parse_moov(moov, metadata)
+            break
+        offset += box_size
+    return metadata
+
+
+def iter_boxes(data: bytes):
+    offset = 0
+    while offset + 8 <= len(data):
+        box_size, box_type = struct.unpack(">I4s", data[offset:offset + 8])
+        header_size = 8
+        if box_size == 1:
+            box_size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header_size = 16
+        elif box_size == 0:
+            box_size = len(data) - offset
+        if box_size < header_size:
+            return
+        yield box_type, data[offset + header_size:offset + box_size]
+        offset += box_size
+
+
+def find_box(data: bytes, *path: bytes) -> Optional[bytes]:
+    for name in path:
+        data = next((body for box_type, body in iter_boxes(data) if box_type == name), None)
+        if data is None:
+            return None
+    return data
+
+
+def parse_duration_box(body: bytes) -> Optional[float]:
+    """Общий разбор mvhd/mdhd: версия определяет ширину полей времени."""
+    if body[0] == 1:
+        timescale, duration = struct.unpack(">IQ", body[20:32])
+    else:
+        timescale, duration = struct.unpack(">II", body[12:20])
+    return duration / timescale if timescale else None
+
+
+def parse_moov(moov: bytes, metadata: AudioMetadata) -> None:
+    mvhd = find_box(moov, b"mvhd")
+    if mvhd:
+        metadata.duration = parse_duration_box(mvhd)
+
+    for box_type, trak in iter_boxes(moov):
+        if box_type != b"trak":
+            continue
+        mdia = find_box(trak, b"mdia")
+        hdlr = find_box(mdia or b"", b"hdlr")
+        if not hdlr or hdlr[8:12] != b"soun":
+            continue
+        mdhd = find_box(mdia, b"mdhd")
+        if mdhd:
+            metadata.duration = parse_duration_box(mdhd) or metadata.duration
+        stsd = find_box(mdia, b"minf", b"stbl", b"stsd")
+        if stsd and len(stsd) >= 8 + 36:
+            entry = stsd[8:]
+            metadata.codec = MP4_CODECS.get(entry[4:8], entry[4:8].decode("latin-1").strip())
+            metadata.channels = struct.unpack(">H", entry[24:26])[0]
+            metadata.sample_rate = struct.unpack(">I", entry[32:36])[0] >> 16
+        break
@@ -0,0 +1,230 @@
+"""Потоковая проверка формата загружаемого аудио.
+
+Сниффер получает те же куски, что пишутся в хранилище, и не требует ни
+повторного чтения, ни перемотки. Контейнер определяется по началу потока,
+а дальше для RIFF, MP4 и Ogg отслеживаются границы чанков/атомов/страниц:
+по ним в конце видно, обрезан ли файл. Памяти нужно не больше окна
+определения формата плюс один заголовок.
+"""
+from typing import Callable, Optional
+
+from fastapi import HTTPException
+
+from src.services.audio_metadata import id3v2_size, is_adts_header, parse_mpeg_frame
+
+SNIFF_WINDOW = 16 * 1024
+MPEG_CHAIN_FRAMES = 3
+MAX_HEADER = 27 + 255  # самый длинный заголовок — страница Ogg
+UNBOUNDED = float("inf")
+
+CONTAINER_TYPES = {
+    "mpeg": ("audio/mpeg",),
+    "adts": ("audio/aac",),
+    "wav": ("audio/wav", "audio/x-wav"),
+    "ogg": ("audio/ogg",),
+    "mp4": ("audio/x-m4a", "audio/mp4"),
+}
+
+# Next boundary, or None when more bytes of the header are needed.
+BoundaryParser = Callable[[bytes, int], Optional[float]]
+
+
+def invalid_audio(detail: str = "Файл не является валидным аудио") -> HTTPException:
+    return HTTPException(status_code=400, detail=detail)
+
+
+class AudioSniffer:
+    def __init__(self, content_type: Optional[str]):
+        self.content_type = content_type
+        self.container: Optional[str] = None
+        self.size = 0
+        # Окно определения формата: байты [_head_start, _head_start + len(_head)).
+        # После ID3v2 окно сдвигается за тег, сам тег не буферизуется.
+        self._head = b""
+        self._head_start = 0
+        # Обход границ контейнера.
+        self._parse: Optional[BoundaryParser] = None
+        self._next_boundary: float = UNBOUNDED
+        self._partial: Optional[bytes] = None
+        self._seen: set[bytes] = set()
+        self._declared_size: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> None:
+        start = self.size
+        self.size += len(chunk)
+        if self.container is not None:
+            self._walk(chunk, start)
+            return
+
+        self._buffer(chunk, start)
+        if self._skip_id3(final=False):
+            self._buffer(chunk, start)
+        self._detect(final=False)
+        if self.container is None:
+            return
+        if self._parse is not None:
+            # Контейнеры с обходом границ начинаются с нулевого байта: сначала
+            # обходим окно, затем остаток текущего куска за ним.
+            head_end = len(self._head)
+            self._walk(self._head, 0)
+            if self.size > head_end:
+                self._walk(chunk[max(head_end - start, 0):], max(head_end, start))
+        self._head = b""
+
+    def finish(self) -> str:
+        if self.container is None:
+            self._skip_id3(final=True)
+            self._detect(final=True)
+        if self._partial is not None or self._next_boundary < UNBOUNDED and self._next_boundary > self.size:
+            raise invalid_audio("Файл обрезан или повреждён")
+        if self._declared_size is not None and self._declared_size > self.size:
+            raise invalid_audio("Файл обрезан или повреждён")
+        if self.container == "wav" and not {b"fmt ", b"data"} <= self._seen:
+            raise invalid_audio("В WAV-файле нет заголовка формата или данных")
+        if self.container == "mp4" and b"moov" not in self._seen:
+            raise invalid_audio("В файле M4A нет атома moov")
+        return self.container
+
+    # --- определение формата ---------------------------------------------
+
+    def _buffer(self, chunk: bytes, start: int) -> None:
+        low = max(self._head_start + len(self._head), start)
+        high = min(self._head_start + SNIFF_WINDOW, start + len(chunk))
+        if high > low:
+            self._head += chunk[low - start:high - start]
+
+    def _skip_id3(self, final: bool) -> bool:
+        if self._head_start or self._head[:3] != b"ID3" or len(self._head) < 10:
+            return False
+        self._head_start = self._declared_size = id3v2_size(self._head)
+        self._head = self._head[self._head_start:]
+        return True
+
+    def _detect(self, final: bool) -> None:
+        head = self._head
+        if self._head_start:
+            self._detect_frames(final)
+            return
+        if len(head) < 12 and not final:
+            return
+        if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+            declared = int.from_bytes(head[4:8], "little")
+            if 0 < declared < 0xFFFFFFF0:  # 0 и ~0 — заглушки потоковой записи
+                self._declared_size = declared + 8
+            self._start_walk("wav", self._riff_chunk, 12)
+        elif head[:4] == b"OggS":
+            self._start_walk("ogg", self._ogg_page, 0)
+        elif head[4:8] == b"ftyp":
+            self._start_walk("mp4", self._mp4_box, 0)
+        elif head[:3] == b"ID3":
+            if final:
+                raise invalid_audio("Файл обрезан или повреждён")
+        else:
+            self._detect_frames(final)
+
+    def _detect_frames(self, final: bool) -> None:
+        if len(self._head) < SNIFF_WINDOW and not final:
+            return
+        data = self._head.lstrip(b"\x00")
+        if not data:
+            raise invalid_audio()
+        if is_adts_header(data):
+            container, frame_length = "adts", _adts_frame_length
+        else:
+            container, frame_length = "mpeg", _mpeg_frame_length
+
+        offset = frames = 0
+        while frames < MPEG_CHAIN_FRAMES and offset + 7 <= len(data):
+            length = frame_length(data[offset:offset + 7])
+            if not length:
+                break
+            frames += 1
+            offset += length
+        # Короткий файл может закончиться раньше, чем наберётся цепочка.
+        if frames < MPEG_CHAIN_FRAMES and not (frames and offset >= len(data) and final):
+            raise invalid_audio()
+        self._set_container(container)
+
+    def _start_walk(self, container: str, parse: BoundaryParser, start: int) -> None:
+        self._set_container(container)
+        self._parse = parse
+        self._next_boundary = start
+
+    def _set_container(self, container: str) -> None:
+        allowed = CONTAINER_TYPES[container]
+        if self.content_type not in allowed:
+            raise invalid_audio(
+                f"Файл имеет сигнатуру {allowed[0]}, но Content-Type: {self.content_type}"
+            )
+        self.container = container
+
+    # --- обход границ ----------------------------------------------------
+
+    def _walk(self, chunk: bytes, start: int) -> None:
+        if self._parse is None:
+            return
+        end = start + len(chunk)
+        while True:
+            if self._partial is None:
+                if self._next_boundary >= end:
+                    return
+                self._partial = b""
+                offset = int(self._next_boundary) - start
+            else:
+                offset = 0
+            self._partial += chunk[offset:offset + MAX_HEADER - len(self._partial)]
+            boundary = self._parse(self._partial, int(self._next_boundary))
+            if boundary is None:
+                if len(self._partial) >= MAX_HEADER:
+                    raise invalid_audio("Повреждённый заголовок в файле")
+                return
+            if boundary <= self._next_boundary:
+                raise invalid_audio("Повреждённый заголовок в файле")
+            self._partial = None
+            self._next_boundary = boundary
+
+    def _riff_chunk(self, header: bytes, position: int) -> Optional[float]:
+        if len(header) < 8:
+            return None
+        chunk_id, size = header[:4], int.from_bytes(header[4:8], "little")
+        self._seen.add(chunk_id)
+        if chunk_id == b"data" and (size == 0 or size >= 0xFFFFFFF0):
+            return UNBOUNDED
+        return position + 8 + size + (size & 1)
+
+    def _mp4_box(self, header: bytes, position: int) -> Optional[float]:
+        if len(header) < 8:
+            return None
+        size, box_type = int.from_bytes(header[:4], "big"), header[4:8]
+        self._seen.add(box_type)
+        if size == 0:
+            return UNBOUNDED
+        if size == 1:
+            if len(header) < 16:
+                return None
+            size = int.from_bytes(header[8:16], "big")
+        if size < 8:
+            raise invalid_audio("Повреждённый заголовок в файле")
+        return position + size
+
+    def _ogg_page(self, header: bytes, position: int) -> Optional[float]:
+        if len(header) < 27:
+            return None
+        if header[:4] != b"OggS" or header[4] != 0:
+            raise invalid_audio("Повреждённая страница Ogg")
+        segments = header[26]
+        if len(header) < 27 + segments:
+            return None
+        return position + 27 + segments + sum(header[27:27 + segments])
+
+
+def _mpeg_frame_length(header: bytes) -> int:
+    frame = parse_mpeg_frame(header)
+    return frame.length if frame else 0
+
+
+def _adts_frame_length(header: bytes) -> int:
+    if not is_adts_header(header):
+        return 0
+    length = ((header[3] & 0x03) << 11) | (header[4] << 3) | (header[5] >> 5)
+    return length if length >= 7 else 0
@@ -0,0 +1,257 @@
+import mimetypes
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from src.conf import audio_settings
+from src.storage import StorageBackend
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+OFFLOAD_X_ACCEL_REDIRECT = "x-accel-redirect"
+OFFLOAD_X_SENDFILE = "x-sendfile"
+# Нестандартные, но распространённые синонимы аудио-типов.
+MEDIA_TYPE_ALIASES = {
+    "audio/x-wav": "audio/wav",
+    "audio/wave": "audio/wav",
+    "audio/x-m4a": "audio/mp4",
+    "audio/mp3": "audio/mpeg",
+}
+
+
+@dataclass(frozen=True, slots=True)
+class ByteRange:
+    start: int
+    end: int  # включительно
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+
+def parse_range(header: str, size: int) -> Optional[ByteRange]:
+    """Разбирает заголовок Range с одним диапазоном.
+
+    Возвращает ``None``, если заголовок не поддерживается (несколько
+    диапазонов, другие единицы) — в этом случае отдаётся весь файл.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise _not_satisfiable(size)
+            return ByteRange(max(size - suffix, 0), size - 1)
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise _not_satisfiable(size)
+    if start > end:
+        return None
+    return ByteRange(start, min(end, size - 1))
+
+
+def _not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"},
+    )
+
+
+def guess_media_type(*names: str) -> str:
+    for name in names:
+        media_type = mimetypes.guess_type(name)[0]
+        if media_type:
+            return media_type
+    return "application/octet-stream"
+
+
+def parse_accept(header: str) -> dict[str, float]:
+    """Разбирает ``Accept`` в словарь «тип -> q» (параметры типа отбрасываются)."""
+    accepted = {}
+    for item in header.split(","):
+        media_type, *params = item.split(";")
+        media_type = media_type.strip().lower()
+        media_type = MEDIA_TYPE_ALIASES.get(media_type, media_type)
+        if not media_type:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[media_type] = max(quality, accepted.get(media_type, 0.0))
+    return accepted
+
+
+def accept_quality(accepted: dict[str, float], media_type: str) -> float:
+    media_type = MEDIA_TYPE_ALIASES.get(media_type, media_type)
+    major = media_type.split("/")[0]
+    for candidate in (media_type, f"{major}/*", "*/*"):
+        if candidate in accepted:
+            return accepted[candidate]
+    return 0.0
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def is_not_modified(request: Request, etag: str, mtime: Optional[float] = None) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and mtime is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+class AudioStreamResponse(Response):
+    """Отдаёт объект хранилища или его диапазон.
+
+    Если объект лежит на локальном диске и сервер поддерживает ASGI-расширение
+    ``http.response.zerocopysend``, байты передаются через ``sendfile`` без
+    копирования в Python; иначе объект читается из хранилища кусками.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        key: str,
+        byte_range: ByteRange,
+        status_code: int,
+        headers: dict[str, str],
+        media_type: str,
+        send_body: bool = True,
+    ):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.storage = storage
+        self.key = key
+        self.byte_range = byte_range
+        self.send_body = send_body
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if not self.send_body or self.byte_range.length <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        local_path = self.storage.local_path(self.key)
+        if local_path is not None and ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            file = await run_in_threadpool(open, local_path, "rb")
+            try:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": file,
+                    "offset": self.byte_range.start,
+                    "count": self.byte_range.length,
+                    "more_body": False,
+                })
+            finally:
+                await run_in_threadpool(file.close)
+            return
+
+        async for chunk in self.storage.stream(self.key, self.byte_range.start, self.byte_range.end):
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+async def stream_file(
+    request: Request,
+    storage: StorageBackend,
+    key: str,
+    file_name: str,
+    media_type: Optional[str] = None,
+) -> Response:
+    stored = await storage.stat(key)
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="File not found"
+        )
+
+    size = stored.size
+    etag = stored.etag
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Last-Modified": formatdate(stored.mtime, usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+
+    if is_not_modified(request, etag, stored.mtime):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size > 0 and (if_range is None or if_range.strip() == etag):
+        byte_range = parse_range(range_header, size)
+
+    status_code = status.HTTP_200_OK
+    if byte_range is None:
+        byte_range = ByteRange(0, size - 1)
+    else:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {byte_range.start}-{byte_range.end}/{size}"
+    headers["Content-Length"] = str(byte_range.length)
+
+    return AudioStreamResponse(
+        storage=storage,
+        key=key,
+        byte_range=byte_range,
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type or guess_media_type(file_name, key),
+        send_body=request.method != "HEAD",
+    )
+
+
+def offload_file(
+    storage: StorageBackend,
+    key: str,
+    file_name: str,
+    media_type: Optional[str] = None,
+) -> Optional[Response]:
+    """Передаёт отдачу файла фронтовому серверу (nginx / apache).
+
+    Python только проверяет права, а байты, Range и кэширование обслуживает
+    веб-сервер. Если режим не настроен (или для X-Sendfile объект не лежит
+    на локальном диске), возвращает ``None``.
+    """
+    mode = audio_settings.AUDIO_DOWNLOAD_OFFLOAD
+    if not mode:
+        return None
+    media_type = media_type or guess_media_type(file_name, key)
+    if mode == OFFLOAD_X_ACCEL_REDIRECT:
+        location = audio_settings.AUDIO_DOWNLOAD_ACCEL_PREFIX.rstrip("/") + "/" + quote(key)
+        return Response(headers={"X-Accel-Redirect": location}, media_type=media_type)
+    if mode == OFFLOAD_X_SENDFILE:
+        local_path = storage.local_path(key)
+        if local_path is not None:
+            return Response(headers={"X-Sendfile": str(local_path)}, media_type=media_type)
+    return None
@@ -0,0 +1,25 @@
+"""Обработчики фоновых задач над загруженным аудио.
+
+Модуль импортируется воркером (``src/worker.py``): при импорте обработчики
+регистрируются в реестре ``src.services.jobs``.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf import transcode_settings, waveform_settings
+from src.services.audio import AudioService, EXTRACT_METADATA, GENERATE_PEAKS, TRANSCODE
+from src.services.jobs import job_handler
+
+
+@job_handler(EXTRACT_METADATA)
+async def extract_metadata(session: AsyncSession, payload: dict) -> None:
+    await AudioService(session).extract_metadata(payload["audio_file_id"])
+
+
+@job_handler(TRANSCODE, concurrency=transcode_settings.TRANSCODE_CONCURRENCY)
+async def transcode(session: AsyncSession, payload: dict) -> None:
+    await AudioService(session).create_rendition(payload["blob_id"], payload["rendition"])
+
+
+@job_handler(GENERATE_PEAKS, concurrency=waveform_settings.PEAKS_CONCURRENCY)
+async def generate_peaks(session: AsyncSession, payload: dict) -> None:
+    await AudioService(session).generate_peaks(payload["blob_id"])
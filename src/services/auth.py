@@ -1,38 +1,161 @@
-from datetime import datetime, UTC
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
 from uuid import UUID
-import logging
 from fastapi import Depends, Security, HTTPException, status
-from fastapi_jwt import JwtAuthorizationCredentials
-from jose import JWTError
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi_jwt.jwt import JwtAuthBase
+from fastapi_jwt.jwt_backends.abstract_backend import BackendException
 from passlib.context import CryptContext
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.crud.user import crud_user, get_by_uid
-from src.database import get_async_session
+from src.cache import token_cache, user_cache
+from src.conf import auth_settings
+from src.crud.user import crud_user
+from src.database import get_async_db
 from src.models import User
-from src.schemas.token import TokenPayload
-from src.services.security import access_security
+from src.schemas.token import TokenPayload, VerifiedToken
+from src.schemas.user import UserSnapshot
+from src.services.presence import presence_tracker
+from src.services.revocation import revocation_store
+from src.services.security import (
+    access_bearer,
+    access_cookie,
+    access_security,
+    refresh_bearer,
+    refresh_security,
+)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-USER_ONLINE_DURATION_MINUTES = 5
 
-async def get_current_user(
-    credentials: JwtAuthorizationCredentials = Security(access_security),
-    db: AsyncSession = Depends(get_async_session),
-) -> User:
-    if credentials is None:
+T = TypeVar("T")
+
+
+class PasswordHasherPool:
+    """Выполняет bcrypt в отдельном пуле потоков ограниченного размера.
+
+    bcrypt отпускает GIL, поэтому потоки считают хэши параллельно, не
+    блокируя event loop. Если в очереди уже ``max_pending`` задач, новые
+    отклоняются с 503 вместо бесконечного ожидания.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, try again later",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher_pool = PasswordHasherPool(
+    max_workers=auth_settings.PASSWORD_HASH_WORKERS,
+    max_pending=auth_settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+def verify_token(security: JwtAuthBase, token: str, token_type: str) -> VerifiedToken:
+    try:
+        payload = security.jwt_backend.decode(token, security.secret_key)
+    except BackendException as ex:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
+            status_code=status.HTTP_401_UNAUTHORIZED, detail=str(ex)
+        ) from ex
+    if payload.get("type") != token_type:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token type"
         )
     try:
-        token_user = TokenPayload(**credentials.subject)
-    except (JWTError, ValidationError) as ex:
+        token_user = TokenPayload(**payload["subject"])
+    except (KeyError, TypeError, ValidationError) as ex:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         ) from ex
-    return await get_user(db=db, user_uid=token_user.uid)
+    return VerifiedToken(user=token_user, jti=payload.get("jti"), expires_at=payload["exp"])
+
+
+async def get_access_token(
+    bearer: Optional[HTTPAuthorizationCredentials] = Security(access_bearer),
+    cookie: Optional[str] = Security(access_cookie),
+    db: AsyncSession = Depends(get_async_db),
+) -> VerifiedToken:
+    """Проверяет access-токен из заголовка или cookie.
+
+    Результат проверки кэшируется по хэшу токена до истечения его срока,
+    поэтому повторные запросы с тем же токеном не проверяют подпись и не
+    валидируют полезную нагрузку заново. Отзыв проверяется всегда, в том
+    числе для закэшированных токенов.
+    """
+    token = bearer.credentials if bearer else cookie
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
+        )
+    key = hashlib.sha256(token.encode()).digest()
+    verified = token_cache.get(key)
+    if verified is None:
+        verified = verify_token(access_security, token, "access")
+        ttl = verified.expires_at - time.time()
+        if ttl > 0:
+            token_cache.set(key, verified, ttl)
+    if verified.jti and await revocation_store.is_revoked(db, verified.jti, verified.expires_at):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
+        )
+    return verified
+
+
+async def get_refresh_token(
+    bearer: Optional[HTTPAuthorizationCredentials] = Security(refresh_bearer),
+) -> VerifiedToken:
+    if bearer is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorized"
+        )
+    return verify_token(refresh_security, bearer.credentials, "refresh")
+
+
+async def get_current_user(
+    token: VerifiedToken = Depends(get_access_token),
+    db: AsyncSession = Depends(get_async_db),
+) -> UserSnapshot:
+    token_user = token.user
+    db.info["user_key"] = token_user.uid
+    user = user_cache.get(token_user.uid)
+    if user is None:
+        user = UserSnapshot.from_user(await get_user(db=db, user_uid=token_user.uid))
+        user_cache.set(token_user.uid, user)
+    presence_tracker.record(user.id)
+    return user
 
 async def get_user(
     db: AsyncSession, user_uid: UUID, fast: bool = False
@@ -40,39 +163,27 @@ async def get_user(
     if fast is True:
         user = await crud_user.get_by_uid_fast(db, uid=user_uid)
     else:
-        user = await get_by_uid(db, uid=user_uid)
+        user = await crud_user.get_by_uid(db, uid=user_uid)
 
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-
-    try:
-        await update_last_visited_at(db=db, user=user)
-    except Exception as ex:
-        logging.exception(ex)
     return user
 
 
 
-async def update_last_visited_at(db: AsyncSession, user: User) -> None:
-    current_time = datetime.now(UTC)
-    if not user.last_visited_at:
-        await crud_user.update(
-            db, db_obj=user, update_data={"last_visited_at": current_time}
-        )
-        return
-    seconds_from_last_online = current_time - user.last_visited_at
-    minutes_from_last_online = seconds_from_last_online.total_seconds() / 60
-    if minutes_from_last_online > USER_ONLINE_DURATION_MINUTES:
-        user.last_visited_at = current_time
-        await db.commit()
-
-
-
-
 async def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_hasher_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Проверяет пароль и, если параметры ``pwd_context`` изменились,
+    возвращает новый хэш, который нужно сохранить."""
+    return await password_hasher_pool.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
 
 async def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return await password_hasher_pool.run(pwd_context.hash, password)
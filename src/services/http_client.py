@@ -0,0 +1,166 @@
+"""Общий HTTP-клиент для внешних сервисов.
+
+Один ``httpx.AsyncClient`` на приложение держит пул keep-alive соединений,
+поэтому TCP и TLS рукопожатия не повторяются на каждый запрос. Поверх
+клиента — явные таймауты, ограниченные повторы с джиттером при сбоях
+транспорта и 5xx (для неидемпотентных методов — только если запрос не
+ушёл) и предохранитель (circuit breaker): пока сервис лежит,
+запросы отклоняются сразу, а не копят ждущие корутины.
+"""
+import asyncio
+import random
+import time
+from typing import Any, Optional
+
+import httpx
+
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Ошибки до отправки запроса: повторять их безопасно для любого метода.
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class CircuitOpenError(Exception):
+    """Предохранитель разомкнут, запрос к сервису не выполнялся."""
+
+
+class CircuitBreaker:
+    """После ``failure_threshold`` сбоев подряд размыкается на
+    ``reset_timeout`` секунд, затем пропускает один пробный запрос:
+    успех замыкает цепь, сбой снова размыкает её."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_request(self) -> bool:
+        """Пропускает запрос или бросает CircuitOpenError. Возвращает True,
+        если запрос пробный: его нужно отпустить через ``release_probe``."""
+        state = self.state
+        if state == "open" or state == "half-open" and self._probing:
+            self.rejected += 1
+            raise CircuitOpenError
+        if state == "half-open":
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        self._probing = False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 0
+        return max(int(self.reset_timeout - (time.monotonic() - self.opened_at)) + 1, 1)
+
+
+class ResilientHTTPClient:
+    def __init__(
+        self,
+        *,
+        connect_timeout: float,
+        read_timeout: float,
+        pool_timeout: float,
+        max_connections: int,
+        max_keepalive: int,
+        retries: int,
+        retry_backoff: float,
+        failure_threshold: int,
+        reset_timeout: float,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.timeout = httpx.Timeout(
+            read_timeout, connect=connect_timeout, pool=pool_timeout
+        )
+        self.limits = httpx.Limits(
+            max_connections=max_connections, max_keepalive_connections=max_keepalive
+        )
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def open(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, transport=self.transport
+            )
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Выполняет запрос с повторами. Идемпотентные методы повторяются при
+        сбоях транспорта и 5xx, остальные (POST обмена кода на токен) — только
+        если запрос не ушёл: сервер мог его уже выполнить. Ответ 5xx после
+        последней попытки возвращается как есть; ошибка транспорта
+        пробрасывается."""
+        client = self.open()
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            probe = self.breaker.before_request()
+            try:
+                response = await client.request(method, url, **kwargs)
+            except httpx.TransportError as ex:
+                self.breaker.record_failure()
+                if attempt >= self.retries or not (idempotent or isinstance(ex, CONNECT_ERRORS)):
+                    raise
+                response = None
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            finally:
+                # Отменённый пробный запрос не должен навсегда занять пробу.
+                if probe:
+                    self.breaker.release_probe()
+            if response is not None:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if attempt >= self.retries or not idempotent:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt * random.uniform(0.5, 1.0))
+            attempt += 1
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def stats(self) -> dict:
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "rejected": self.breaker.rejected,
+        }
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import random
+import socket
+from collections import Counter
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.conf import job_settings
+from src.crud.job import CRUDJob
+from src.database import async_session
+from src.models import Job
+
+logger = logging.getLogger(__name__)
+
+JobFunc = Callable[[AsyncSession, dict], Awaitable[None]]
+
+
+@dataclass
+class JobHandler:
+    func: JobFunc
+    concurrency: Optional[int] = None
+    semaphore: Optional[asyncio.Semaphore] = None
+
+
+handlers: dict[str, JobHandler] = {}
+
+
+def job_handler(kind: str, concurrency: Optional[int] = None):
+    """Регистрирует обработчик задач вида ``kind``.
+
+    ``concurrency`` ограничивает число одновременно выполняемых задач
+    этого вида в одном процессе воркера поверх общего лимита.
+    """
+    def decorator(func: JobFunc) -> JobFunc:
+        handlers[kind] = JobHandler(func=func, concurrency=concurrency)
+        return func
+    return decorator
+
+
+async def enqueue_job(
+    session: AsyncSession,
+    kind: str,
+    payload: dict,
+    priority: int = 0,
+    delay: float = 0,
+) -> Job:
+    return await CRUDJob(session).enqueue(
+        kind,
+        payload,
+        priority=priority,
+        max_attempts=job_settings.JOB_MAX_ATTEMPTS,
+        delay=delay,
+    )
+
+
+def retry_delay(attempts: int) -> float:
+    """Экспоненциальная отсрочка с джиттером, чтобы повторы упавших разом
+    задач не приходили одной волной."""
+    delay = min(
+        job_settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        job_settings.JOB_RETRY_MAX_DELAY,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobWorker:
+    def __init__(
+        self,
+        concurrency: int = job_settings.JOB_WORKER_CONCURRENCY,
+        poll_interval: float = job_settings.JOB_POLL_INTERVAL,
+    ):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.running: set[asyncio.Task] = set()
+        self.job_ids: set[int] = set()
+        self.kind_running: Counter[str] = Counter()
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        for handler in handlers.values():
+            if handler.concurrency:
+                handler.semaphore = asyncio.Semaphore(handler.concurrency)
+        logger.info("Воркер %s запущен, задачи: %s", self.worker_id, ", ".join(handlers))
+
+        last_requeue = 0.0
+        loop = asyncio.get_running_loop()
+        while not self._stopping.is_set():
+            if loop.time() - last_requeue > job_settings.JOB_LOCK_TIMEOUT / 4:
+                last_requeue = loop.time()
+                await self._heartbeat()
+                await self._requeue_stale()
+
+            free = self.concurrency - len(self.running)
+            jobs = await self._claim(free) if free else []
+            for job in jobs:
+                self.job_ids.add(job.id)
+                self.kind_running[job.kind] += 1
+                task = asyncio.create_task(self.execute(job))
+                self.running.add(task)
+                task.add_done_callback(self.running.discard)
+
+            if not jobs or len(self.running) >= self.concurrency:
+                await self._wait()
+
+        if self.running:
+            await asyncio.gather(*self.running, return_exceptions=True)
+        logger.info("Воркер %s остановлен", self.worker_id)
+
+    async def _wait(self) -> None:
+        waiters = [asyncio.ensure_future(self._stopping.wait())]
+        if len(self.running) >= self.concurrency:
+            waiters += list(self.running)
+        await asyncio.wait(
+            waiters,
+            timeout=self.poll_interval,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        waiters[0].cancel()
+
+    async def _claim(self, limit: int) -> list[Job]:
+        """Берёт до ``limit`` задач. Виды с собственным лимитом берутся
+        отдельно и не больше свободных мест этого вида: лишняя задача ждала
+        бы семафор, держа блокировку, которую мог бы использовать другой
+        воркер."""
+        unlimited = [kind for kind, handler in handlers.items() if not handler.concurrency]
+        limited = {
+            kind: handler.concurrency - self.kind_running[kind]
+            for kind, handler in handlers.items()
+            if handler.concurrency
+        }
+        jobs: list[Job] = []
+        try:
+            async with async_session() as session:
+                crud = CRUDJob(session)
+                # Сначала виды с лимитом: их доля ограничена, а поток
+                # остальных задач иначе мог бы не оставить им мест.
+                for kind, free in limited.items():
+                    free = min(free, limit - len(jobs))
+                    if free > 0:
+                        jobs += await crud.claim(self.worker_id, [kind], free)
+                if unlimited and len(jobs) < limit:
+                    jobs += await crud.claim(self.worker_id, unlimited, limit - len(jobs))
+        except Exception as ex:
+            logging.exception(ex)
+        return jobs
+
+    async def _heartbeat(self) -> None:
+        if not self.job_ids:
+            return
+        try:
+            async with async_session() as session:
+                await CRUDJob(session).heartbeat(self.worker_id, self.job_ids)
+        except Exception as ex:
+            logging.exception(ex)
+
+    async def _requeue_stale(self) -> None:
+        try:
+            async with async_session() as session:
+                count = await CRUDJob(session).requeue_stale(job_settings.JOB_LOCK_TIMEOUT)
+            if count:
+                logger.warning("Возвращено в очередь зависших задач: %s", count)
+        except Exception as ex:
+            logging.exception(ex)
+
+    async def execute(self, job: Job) -> None:
+        handler = handlers[job.kind]
+        try:
+            if handler.semaphore:
+                async with handler.semaphore:
+                    await self._call(handler, job)
+            else:
+                await self._call(handler, job)
+        except Exception as ex:
+            logger.exception("Задача %s (%s) упала, попытка %s", job.id, job.kind, job.attempts)
+            async with async_session() as session:
+                await CRUDJob(session).retry_or_fail(
+                    job, self.worker_id, f"{type(ex).__name__}: {ex}", retry_delay(job.attempts)
+                )
+        else:
+            async with async_session() as session:
+                if not await CRUDJob(session).complete(job.id, self.worker_id):
+                    logger.warning("Задача %s (%s) уже передана другому воркеру", job.id, job.kind)
+        finally:
+            self.job_ids.discard(job.id)
+            self.kind_running[job.kind] -= 1
+
+    @staticmethod
+    async def _call(handler: JobHandler, job: Job) -> None:
+        async with async_session() as session:
+            await handler.func(session, job.payload)
@@ -0,0 +1,32 @@
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.cache import token_cache, user_cache
+from src.crud.job import CRUDJob
+from src.database import pool_stats, routing_stats
+from src.schemas.user import UserSnapshot
+from src.services.auth import password_hasher_pool
+from src.services.presence import presence_tracker
+from src.services.revocation import revocation_store
+from src.services.upload_limits import upload_limiter
+from src.services.yndex import yandex_http
+
+
+async def collect_metrics(db: AsyncSession, current_user: UserSnapshot) -> dict:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superusers can perform this action"
+        )
+    return {
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "revoked_tokens": revocation_store.stats(),
+        "presence": presence_tracker.stats(),
+        "password_hasher": password_hasher_pool.stats(),
+        "uploads": upload_limiter.stats(),
+        "yandex_oauth": yandex_http.stats(),
+        "db_pool": pool_stats(),
+        "db_routing": routing_stats(),
+        "jobs": await CRUDJob(db).count_by_status(),
+    }
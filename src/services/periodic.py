@@ -0,0 +1,12 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+
+async def run_periodically(interval: float, func: Callable[[], Awaitable[object]]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await func()
+        except Exception as ex:
+            logging.exception(ex)
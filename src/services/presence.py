@@ -0,0 +1,81 @@
+import time
+from datetime import datetime, UTC
+
+from sqlalchemy import DateTime, Integer, column, func, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf import auth_settings
+from src.database import async_session
+from src.models import User
+
+FLUSH_BATCH_SIZE = 1000
+
+
+class PresenceTracker:
+    """Копит отметки о посещениях в памяти и пишет их в БД пачками.
+
+    Отметки одного пользователя схлопываются: в буфере хранится только
+    последнее посещение, а повторные в пределах ``throttle`` секунд вообще
+    не записываются.
+    """
+
+    def __init__(self, throttle: float):
+        self.throttle = throttle
+        self._pending: dict[int, datetime] = {}
+        self._recorded_at: dict[int, float] = {}
+        self.flushed = 0
+
+    def record(self, user_id: int) -> None:
+        now = time.monotonic()
+        recorded_at = self._recorded_at.get(user_id)
+        if recorded_at is not None and now - recorded_at < self.throttle:
+            return
+        self._recorded_at[user_id] = now
+        self._pending[user_id] = datetime.now(UTC)
+
+    async def flush(self, db: AsyncSession) -> int:
+        if not self._pending:
+            self._forget_stale()
+            return 0
+        pending, self._pending = self._pending, {}
+        items = list(pending.items())
+        try:
+            for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                visits = values(
+                    column("id", Integer),
+                    column("visited_at", DateTime(timezone=True)),
+                    name="visits",
+                ).data(items[start:start + FLUSH_BATCH_SIZE])
+                await db.execute(
+                    update(User)
+                    .where(User.id == visits.c.id)
+                    .values(last_visited_at=func.greatest(User.last_visited_at, visits.c.visited_at))
+                )
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            for user_id, visited_at in pending.items():
+                self._pending[user_id] = max(visited_at, self._pending.get(user_id, visited_at))
+            raise
+        self.flushed += len(items)
+        self._forget_stale()
+        return len(items)
+
+    def _forget_stale(self) -> None:
+        deadline = time.monotonic() - self.throttle
+        self._recorded_at = {
+            user_id: recorded_at
+            for user_id, recorded_at in self._recorded_at.items()
+            if recorded_at >= deadline
+        }
+
+    def stats(self) -> dict:
+        return {"pending": len(self._pending), "flushed": self.flushed}
+
+
+presence_tracker = PresenceTracker(throttle=auth_settings.PRESENCE_THROTTLE)
+
+
+async def flush_presence() -> None:
+    async with async_session() as db:
+        await presence_tracker.flush(db)
@@ -0,0 +1,140 @@
+"""Отозванные токены без обращения к БД на каждом запросе.
+
+Источник истины — таблица ``revoked_token``. В памяти процесса лежат
+bloom-фильтры, разбитые по времени истечения токенов: токен попадает в
+корзину своего ``exp``, и корзина выбрасывается целиком, когда истекли
+все токены, которые могли в неё попасть. Проверка — один фильтр, O(1).
+
+Отрицательный ответ фильтра точен, поэтому почти все запросы обходятся
+без БД; положительный (отозванный токен или ложное срабатывание)
+подтверждается запросом к таблице. Фильтры догоняют таблицу периодической
+синхронизацией, отзывы в текущем процессе видны сразу.
+"""
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, UTC
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf import auth_settings
+from src.crud.revoked_token import CRUDRevokedToken
+from src.database import async_session
+
+# Перекрытие окна синхронизации: отзыв, закоммиченный позже соседних,
+# может иметь более ранний revoked_at. Повторное добавление безвредно.
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    def __init__(self, bucket_seconds: int, capacity: int, error_rate: float):
+        self.bucket_seconds = bucket_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.synced_until: Optional[datetime] = None
+        self._buckets: dict[int, BloomFilter] = {}
+        self.checks = 0
+        self.positives = 0
+        self.confirmed = 0
+
+    def _bucket(self, expires_at: float) -> int:
+        return int(expires_at // self.bucket_seconds)
+
+    def add(self, jti: str, expires_at: float) -> None:
+        if expires_at <= time.time():
+            return
+        bucket = self._bucket(expires_at)
+        bloom = self._buckets.get(bucket)
+        if bloom is None:
+            bloom = self._buckets[bucket] = BloomFilter(self.capacity, self.error_rate)
+        if jti not in bloom:
+            bloom.add(jti)
+
+    def might_be_revoked(self, jti: str, expires_at: float) -> bool:
+        self.checks += 1
+        bloom = self._buckets.get(self._bucket(expires_at))
+        if bloom is None or jti not in bloom:
+            return False
+        self.positives += 1
+        return True
+
+    async def is_revoked(self, db: AsyncSession, jti: str, expires_at: float) -> bool:
+        if not self.might_be_revoked(jti, expires_at):
+            return False
+        revoked = await CRUDRevokedToken(db).is_revoked(jti)
+        if revoked:
+            self.confirmed += 1
+        return revoked
+
+    async def revoke(self, db: AsyncSession, jti: str, expires_at: float) -> bool:
+        """Отзывает токен (без commit); см. ``CRUDRevokedToken.revoke``."""
+        revoked = await CRUDRevokedToken(db).revoke(jti, datetime.fromtimestamp(expires_at, UTC))
+        self.add(jti, expires_at)
+        return revoked
+
+    def evict_expired(self) -> None:
+        current = self._bucket(time.time())
+        for bucket in [bucket for bucket in self._buckets if bucket < current]:
+            del self._buckets[bucket]
+
+    async def sync(self, db: AsyncSession) -> None:
+        since = self.synced_until - SYNC_OVERLAP if self.synced_until else None
+        for jti, expires_at, revoked_at in await CRUDRevokedToken(db).get_revoked_since(since):
+            self.add(jti, expires_at.timestamp())
+            if self.synced_until is None or revoked_at > self.synced_until:
+                self.synced_until = revoked_at
+        self.evict_expired()
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self._buckets),
+            "entries": sum(bloom.count for bloom in self._buckets.values()),
+            "bytes": sum(len(bloom.bits) for bloom in self._buckets.values()),
+            "checks": self.checks,
+            "positives": self.positives,
+            "confirmed": self.confirmed,
+        }
+
+
+revocation_store = RevocationStore(
+    bucket_seconds=auth_settings.REVOCATION_BUCKET_SECONDS,
+    capacity=auth_settings.REVOCATION_BUCKET_CAPACITY,
+    error_rate=auth_settings.REVOCATION_ERROR_RATE,
+)
+
+
+async def sync_revocations() -> None:
+    async with async_session() as db:
+        await revocation_store.sync(db)
+        await CRUDRevokedToken(db).delete_expired()
+
+
+async def load_revocations() -> None:
+    try:
+        await sync_revocations()
+    except Exception as ex:
+        logging.exception(ex)
@@ -1,5 +1,6 @@
 from datetime import timedelta
 
+from fastapi.security import APIKeyCookie, HTTPBearer
 from fastapi_jwt import JwtAccessBearerCookie, JwtRefreshBearer
 
 from src.conf import jwt_settings
@@ -28,3 +29,11 @@ refresh_security = JwtRefreshBearer(
 
 ACCESS_TOKEN_COOKIE_KEY = "access_token_cookie"
 REFRESH_TOKEN_COOKIE_KEY = "refresh_token_cookie"
+
+# Схемы для зависимостей, которые читают токен сами (см. get_access_token).
+# Имена схем совпадают с fastapi_jwt, чтобы в OpenAPI не было дублей.
+access_bearer = HTTPBearer(auto_error=False, scheme_name="JwtAccessBearer")
+access_cookie = APIKeyCookie(
+    name=ACCESS_TOKEN_COOKIE_KEY, auto_error=False, scheme_name="JwtAccessCookie"
+)
+refresh_bearer = HTTPBearer(auto_error=False, scheme_name="JwtRefreshBearer")
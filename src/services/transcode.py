@@ -0,0 +1,100 @@
+"""Перекодирование аудио через ffmpeg.
+
+Каждое перекодирование — отдельный процесс ffmpeg, поэтому они
+выполняются на разных ядрах и не держат event loop воркера. Число
+одновременных процессов ограничивает обработчик задачи.
+"""
+import asyncio
+from pathlib import Path
+from typing import AsyncIterator
+
+from src.conf import RenditionSpec, transcode_settings
+
+
+class TranscodeError(RuntimeError):
+    pass
+
+
+def ffmpeg_command(source: Path, target: Path, spec: RenditionSpec) -> list[str]:
+    return [
+        transcode_settings.FFMPEG_PATH,
+        "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", str(source),
+        "-vn", "-map_metadata", "-1",
+        "-c:a", spec.codec,
+        "-b:a", spec.bitrate,
+        *spec.options,
+        "-f", spec.format,
+        "-y", str(target),
+    ]
+
+
+async def transcode(source: Path, target: Path, spec: RenditionSpec) -> None:
+    process = await asyncio.create_subprocess_exec(
+        *ffmpeg_command(source, target, spec),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        _, stderr = await asyncio.wait_for(
+            process.communicate(), timeout=transcode_settings.TRANSCODE_TIMEOUT
+        )
+    except BaseException:
+        # Таймаут или отмена задачи: процесс не должен пережить воркер.
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        raise
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip()[-2000:]
+        raise TranscodeError(f"ffmpeg завершился с кодом {process.returncode}: {message}")
+
+
+async def read_tail(stream: asyncio.StreamReader, limit: int = 64 * 1024) -> bytes:
+    """Читает поток до конца, сохраняя только последние ``limit`` байт."""
+    tail = bytearray()
+    while chunk := await stream.read(limit):
+        tail += chunk
+        del tail[:-limit]
+    return bytes(tail)
+
+
+async def decode_pcm(
+    source: Path, sample_rate: int, chunk_size: int = 256 * 1024
+) -> AsyncIterator[bytes]:
+    """Декодирует файл в моно PCM s16le и отдаёт его кусками по мере готовности.
+
+    stderr читается параллельно: иначе ffmpeg, заполнив буфер канала
+    сообщениями, остановится и перестанет писать PCM.
+    """
+    process = await asyncio.create_subprocess_exec(
+        transcode_settings.FFMPEG_PATH,
+        "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", str(source),
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1",
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stderr_task = asyncio.create_task(read_tail(process.stderr))
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + transcode_settings.TRANSCODE_TIMEOUT
+    try:
+        while chunk := await asyncio.wait_for(
+            process.stdout.read(chunk_size), max(deadline - loop.time(), 0)
+        ):
+            yield chunk
+        stderr = await asyncio.wait_for(
+            asyncio.shield(stderr_task), max(deadline - loop.time(), 0)
+        )
+        await process.wait()
+    finally:
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        stderr_task.cancel()
+    if process.returncode != 0:
+        message = stderr.decode(errors="replace").strip()[-2000:]
+        raise TranscodeError(f"ffmpeg завершился с кодом {process.returncode}: {message}")
@@ -0,0 +1,174 @@
+"""Допуск загрузок: число одновременных загрузок, скорость приёма байтов
+и предварительная проверка квоты.
+
+Всё решается до чтения тела запроса: отклонённая загрузка не занимает ни
+диск, ни канал. Счётчики и вёдра токенов живут в процессе, как и пул
+хэширования паролей, — при нескольких воркерах лимиты действуют на каждый.
+"""
+import asyncio
+import time
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from src.conf import audio_settings
+from src.database import get_async_db
+from src.schemas.user import UserSnapshot
+from src.services.audio import AudioService
+from src.services.auth import get_current_user
+
+FORM_OVERHEAD = 64 * 1024  # заголовки частей multipart
+
+
+class TokenBucket:
+    """Ведро токенов для байтов.
+
+    Кусок списывается целиком, даже если уводит баланс в минус, после чего
+    потребитель ждёт погашения долга. Так проходят и куски крупнее
+    ``burst``, а средняя скорость не превышает ``rate``.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: int) -> float:
+        """Списывает ``amount`` и возвращает, сколько секунд нужно подождать."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return max(-self.tokens / self.rate, 0.0)
+
+
+class UploadLimiter:
+    def __init__(
+        self,
+        max_uploads: int,
+        max_user_uploads: int,
+        user_rate: int,
+        rate: int,
+        burst: int,
+    ):
+        self.max_uploads = max_uploads
+        self.max_user_uploads = max_user_uploads
+        self.user_rate = user_rate
+        self.burst = burst
+        self.active = 0
+        self.rejected = 0
+        self.throttled = 0.0
+        self._users: dict[int, int] = {}
+        self._user_buckets: dict[int, TokenBucket] = {}
+        self._bucket = TokenBucket(rate, burst) if rate else None
+
+    @asynccontextmanager
+    async def slot(self, user_id: int) -> AsyncIterator[None]:
+        user_active = self._users.get(user_id, 0)
+        if self.active >= self.max_uploads or user_active >= self.max_user_uploads:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Слишком много одновременных загрузок, повторите позже",
+                headers={"Retry-After": "1"},
+            )
+        self.active += 1
+        self._users[user_id] = user_active + 1
+        if self.user_rate and user_id not in self._user_buckets:
+            self._user_buckets[user_id] = TokenBucket(self.user_rate, self.burst)
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._users[user_id] -= 1
+            if not self._users[user_id]:
+                del self._users[user_id]
+                self._user_buckets.pop(user_id, None)
+
+    async def throttle(self, chunks: AsyncIterator[bytes], user_id: int) -> AsyncIterator[bytes]:
+        """Пропускает поток со скоростью не выше лимитов пользователя и
+        процесса. Пока поток ждёт, тело не читается из сокета и клиент
+        замедляется через TCP."""
+        buckets = [
+            bucket for bucket in (self._user_buckets.get(user_id), self._bucket) if bucket
+        ]
+        async for chunk in chunks:
+            if buckets:
+                delay = max(bucket.reserve(len(chunk)) for bucket in buckets)
+                if delay:
+                    self.throttled += delay
+                    await asyncio.sleep(delay)
+            yield chunk
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "max_uploads": self.max_uploads,
+            "users": len(self._users),
+            "rejected": self.rejected,
+            "throttled_seconds": round(self.throttled, 3),
+        }
+
+
+upload_limiter = UploadLimiter(
+    max_uploads=audio_settings.AUDIO_UPLOAD_MAX_CONCURRENT,
+    max_user_uploads=audio_settings.AUDIO_UPLOAD_MAX_CONCURRENT_PER_USER,
+    user_rate=audio_settings.AUDIO_UPLOAD_USER_RATE,
+    rate=audio_settings.AUDIO_UPLOAD_RATE,
+    burst=audio_settings.AUDIO_UPLOAD_RATE_BURST,
+)
+
+
+def content_length(request: Request) -> Optional[int]:
+    try:
+        return int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        return None
+
+
+async def upload_slot(
+    request: Request,
+    current_user: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+) -> AsyncIterator[UserSnapshot]:
+    """Зависимость эндпоинтов загрузки: проверяет квоту по Content-Length
+    и занимает слот на время обработки запроса."""
+    size = content_length(request)
+    if size:
+        await AudioService(db).check_quota(current_user, size)
+    async with upload_limiter.slot(current_user.id):
+        yield current_user
+
+
+@asynccontextmanager
+async def read_upload_file(
+    request: Request,
+    user_id: int,
+    audio: AudioService,
+    field: str = "file",
+) -> AsyncIterator[UploadFile]:
+    """Разбирает multipart-тело с ограничением размера и скорости.
+
+    FastAPI читает форму до вызова зависимостей, поэтому эндпоинт загрузки
+    принимает ``Request`` и разбирает тело сам, уже получив слот.
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(status_code=400, detail="Ожидается multipart/form-data")
+    body = audio.limit_stream(request.stream(), audio.max_size + FORM_OVERHEAD)
+    try:
+        async with aclosing(upload_limiter.throttle(body, user_id)) as stream:
+            form = await MultiPartParser(request.headers, stream, max_files=1, max_fields=8).parse()
+    except MultiPartException as exc:
+        raise HTTPException(status_code=400, detail=exc.message)
+    try:
+        file = form.get(field)
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail=f"Не передан файл в поле {field}")
+        yield file
+    finally:
+        await form.close()
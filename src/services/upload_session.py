@@ -0,0 +1,203 @@
+import time
+from typing import AsyncIterator
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf import audio_settings
+from src.crud.upload_session import CRUDUploadSession
+from src.database import async_session
+from src.models import UploadSession
+from src.schemas.audio import UploadSessionCreate
+from src.schemas.user import UserSnapshot
+from src.services.audio import AudioService
+from src.services.audio_sniffer import AudioSniffer
+from src.storage import StoredObject
+
+STAGING_PREFIX = "sessions"
+
+
+class UploadSessionService:
+    """Возобновляемая загрузка: файл приходит пронумерованными чанками.
+
+    Каждый чанк пишется отдельным объектом под префиксом сессии в основном
+    хранилище, поэтому чанки можно отправлять параллельно, в любом порядке
+    и на любой экземпляр приложения, а повторная отправка чанка просто
+    перезаписывает его. После завершения файл собирается из чанков.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.crud = CRUDUploadSession(session)
+        self.audio = AudioService(session)
+        self.storage = self.audio.storage
+        self.chunk_size = audio_settings.AUDIO_UPLOAD_SESSION_CHUNK_SIZE
+        self.ttl = audio_settings.AUDIO_UPLOAD_SESSION_TTL
+
+    async def create_session(self, user: UserSnapshot, create_data: UploadSessionCreate) -> dict:
+        self.audio.check_type(create_data.content_type, create_data.filename)
+        if create_data.total_size > self.audio.max_size:
+            raise self.audio._too_large(self.audio.max_size)
+        await self.audio.check_quota(user, create_data.total_size)
+
+        upload_session = await self.crud.create_upload_session(
+            user_id=user.id,
+            file_name=create_data.file_name,
+            filename=create_data.filename,
+            content_type=create_data.content_type,
+            total_size=create_data.total_size,
+            chunk_size=self.chunk_size,
+            ttl=self.ttl,
+        )
+        return self._describe(upload_session, received=[])
+
+    async def get_status(self, user: UserSnapshot, session_id: UUID) -> dict:
+        upload_session = await self._get_session(user, session_id)
+        received = await self._received_chunks(upload_session.id)
+        return self._describe(upload_session, received)
+
+    async def put_chunk(
+            self,
+            user: UserSnapshot,
+            session_id: UUID,
+            index: int,
+            body: AsyncIterator[bytes],
+    ) -> dict:
+        upload_session = await self._get_session(user, session_id)
+        if not 0 <= index < upload_session.total_chunks:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Номер чанка должен быть от 0 до {upload_session.total_chunks - 1}"
+            )
+        expected = upload_session.chunk_length(index)
+        chunk_key = self._chunk_key(upload_session.id, index)
+        body = self.audio.limit_stream(body, expected)
+        if index == 0:
+            # Формат проверяется по первому чанку, чтобы не принимать
+            # остальные; полная проверка — при сборке файла.
+            body = self.audio.sniff_stream(body, AudioSniffer(upload_session.content_type), finish=False)
+        # Чанк пишется во временный ключ и занимает своё место только после
+        # проверки размера: короткий повтор не затрёт уже принятый чанк.
+        staging_key = f"{self._session_prefix(upload_session.id)}{uuid4().hex}.tmp"
+        try:
+            stored = await self.storage.put(staging_key, body)
+            size = stored.size
+            if size != expected:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Ожидалось {expected} байт, получено {size}"
+                )
+            await self.storage.move(staging_key, chunk_key)
+            staging_key = None
+        finally:
+            if staging_key is not None:
+                await self.storage.delete(staging_key)
+        return {"index": index, "offset": index * upload_session.chunk_size, "size": size}
+
+    async def complete(self, user: UserSnapshot, session_id: UUID) -> dict:
+        """Собирает файл. Сессия забирается в начале транзакции и удаляется
+        вместе с созданием записи файла, поэтому повторный или параллельный
+        вызов не соберёт файл второй раз; при ошибке сессия остаётся."""
+        upload_session = await self.crud.claim_upload_session(session_id, user.id)
+        if not upload_session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Сессия загрузки не найдена"
+            )
+        try:
+            received = await self._received_objects(upload_session.id)
+            missing = sorted(set(range(upload_session.total_chunks)) - set(received))
+            if missing:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail={"message": "Загружены не все чанки", "missing_chunks": missing},
+                )
+            invalid = [
+                index for index in range(upload_session.total_chunks)
+                if received[index].size != upload_session.chunk_length(index)
+            ]
+            total = sum(received[index].size for index in range(upload_session.total_chunks))
+            if invalid or total != upload_session.total_size:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail={"message": "Размер чанков не совпадает с заявленным", "invalid_chunks": invalid},
+                )
+
+            blob = await self.audio.store_content(
+                user, self._iter_chunks(upload_session), upload_session.content_type
+            )
+            result = await self.audio.register_file(
+                user, upload_session.file_name, blob, self.audio.file_format(upload_session.filename)
+            )
+        except Exception:
+            await self.audio.discard_new_content()
+            raise
+
+        await self._delete_chunks(session_id)
+        return result
+
+    async def cleanup_expired(self) -> int:
+        expired = await self.crud.delete_expired_upload_sessions()
+        for session_id in expired:
+            await self._delete_chunks(session_id)
+        await self._sweep_stale_chunks()
+        return len(expired)
+
+    async def _get_session(self, user: UserSnapshot, session_id: UUID) -> UploadSession:
+        upload_session = await self.crud.get_user_upload_session(session_id, user.id)
+        if not upload_session:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Сессия загрузки не найдена"
+            )
+        return upload_session
+
+    async def _iter_chunks(self, upload_session: UploadSession) -> AsyncIterator[bytes]:
+        for index in range(upload_session.total_chunks):
+            async for data in self.storage.stream(self._chunk_key(upload_session.id, index)):
+                yield data
+
+    def _describe(self, upload_session: UploadSession, received: list[int]) -> dict:
+        return {
+            "id": upload_session.id,
+            "chunk_size": upload_session.chunk_size,
+            "total_size": upload_session.total_size,
+            "total_chunks": upload_session.total_chunks,
+            "received_chunks": received,
+            "expires_at": upload_session.expires_at,
+        }
+
+    @staticmethod
+    def _session_prefix(session_id: UUID) -> str:
+        return f"{STAGING_PREFIX}/{session_id}/"
+
+    @classmethod
+    def _chunk_key(cls, session_id: UUID, index: int) -> str:
+        return f"{cls._session_prefix(session_id)}{index:08d}.part"
+
+    async def _received_objects(self, session_id: UUID) -> dict[int, StoredObject]:
+        objects = await self.storage.list_objects(self._session_prefix(session_id))
+        return {
+            int(obj.key.rpartition("/")[2].removesuffix(".part")): obj
+            for obj in objects
+            if obj.key.endswith(".part")
+        }
+
+    async def _received_chunks(self, session_id: UUID) -> list[int]:
+        return sorted(await self._received_objects(session_id))
+
+    async def _delete_chunks(self, session_id: UUID) -> None:
+        for obj in await self.storage.list_objects(self._session_prefix(session_id)):
+            await self.storage.delete(obj.key)
+
+    async def _sweep_stale_chunks(self) -> None:
+        """Удаляет чанки сессий, запись о которых пропала без очистки."""
+        deadline = time.time() - self.ttl
+        for obj in await self.storage.list_objects(f"{STAGING_PREFIX}/"):
+            if obj.mtime < deadline:
+                await self.storage.delete(obj.key)
+
+
+async def cleanup_expired_upload_sessions() -> None:
+    async with async_session() as db:
+        await UploadSessionService(db).cleanup_expired()
@@ -1,4 +1,6 @@
+import json
 import uuid
+from typing import AsyncIterator, Optional
 from uuid import UUID
 
 from fastapi import HTTPException, status
@@ -6,10 +8,13 @@ from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
+from src.conf import auth_settings
 from src.crud.user import crud_user
 from src.models.user import User
-from src.schemas.user import UserCreate, UserCreateDB, UserUpdate
+from src.schemas.user import UserCreate, UserCreateDB, UserSnapshot, UserUpdate
+from src.services.audio import AudioService
 from src.services.auth import hash_password
+from src.services.pagination import decode_cursor, encode_cursor
 
 
 async def create_user(
@@ -39,8 +44,47 @@ async def create_user(
     return user_created
 
 
+async def list_users(
+        db: AsyncSession,
+        cursor: Optional[str],
+        limit: int,
+) -> dict:
+    after_id = None
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+            )
+        after_id = values[0]
+
+    rows = await crud_user.get_users_page(db, after_id=after_id, limit=limit + 1)
+    next_cursor = encode_cursor(rows[limit - 1].id) if len(rows) > limit else None
+    return {"items": rows[:limit], "next_cursor": next_cursor}
+
+
+def export_users(db: AsyncSession, current_user: UserSnapshot) -> AsyncIterator[bytes]:
+    """NDJSON-выгрузка всех пользователей. Права проверяются сразу, до
+    начала ответа; строки читаются с серверного курсора пачками."""
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only superusers can perform this action"
+        )
+    return _export_lines(db)
+
+
+async def _export_lines(db: AsyncSession) -> AsyncIterator[bytes]:
+    batches = crud_user.stream_users(db, batch_size=auth_settings.USER_EXPORT_BATCH_SIZE)
+    async for rows in batches:
+        yield "".join(
+            json.dumps({"uid": str(row.uid), "username": row.username, "email": row.email}) + "\n"
+            for row in rows
+        ).encode()
+
+
 async def update_user(
-    db: AsyncSession, update_schema: UserUpdate, user: User
+    db: AsyncSession, update_schema: UserUpdate, user: UserSnapshot
 ) -> User:
     try:
         update_data = update_schema.model_dump(exclude_unset=True)
@@ -63,7 +107,7 @@ async def make_superuser(
         db: AsyncSession,
         user_uid: UUID,
         is_superuser: bool,
-        current_user: User
+        current_user: UserSnapshot
 ) -> User:
     if not current_user.is_superuser:
         raise HTTPException(
@@ -89,7 +133,7 @@ async def make_superuser(
 async def delete_user(
         db: AsyncSession,
         user_uid: UUID,
-        current_user: User
+        current_user: UserSnapshot
 ) -> dict:
     if not current_user.is_superuser:
         raise HTTPException(
@@ -103,11 +147,16 @@ async def delete_user(
             detail="Cannot delete yourself"
         )
 
-    success = await crud_user.delete_user(db, uid=user_uid)
-    if not success:
+    user = await crud_user.get_by_uid_fast(db, uid=user_uid)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
 
+    audio_service = AudioService(db)
+    unused_keys = await audio_service.release_user_files(user.id)
+    await crud_user.delete_user(db, uid=user_uid)
+    await audio_service.delete_content(unused_keys)
+
     return {"status": "success", "message": "User deleted"}
\ No newline at end of file
@@ -0,0 +1,185 @@
+"""Пики для отрисовки волны (waveform).
+
+Содержимое один раз декодируется в моно PCM, по блокам считаются min/max,
+а затем попарной редукцией строятся всё более грубые уровни. Результат
+хранится бинарным файлом рядом с оригиналом:
+
+    заголовок | число пиков каждого уровня (u32) | уровень 0 | уровень 1 | ...
+
+Уровень — чередующиеся пары (min, max) в int8 или int16 little-endian,
+уровень 0 самый подробный. Заголовок позволяет прочитать из хранилища
+только нужный уровень.
+"""
+import hashlib
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from src.storage import StorageBackend
+
+MAGIC = b"PEAK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHIIQH")  # magic, version, bits, reserved, rate, block, samples, levels
+MAX_LEVELS = 48
+
+Level = tuple[np.ndarray, np.ndarray]  # (mins, maxs) в int16
+
+
+def peaks_version(sample_rate: int, block_size: int, bits: int, min_level_size: int) -> str:
+    """Отпечаток формата и параметров расчёта: входит в ключ файла пиков,
+    поэтому после смены настроек пики пишутся под новым ключом и ETag
+    ответа меняется вместе с данными."""
+    params = f"{VERSION}:{sample_rate}:{block_size}:{bits}:{min_level_size}"
+    return hashlib.sha256(params.encode()).hexdigest()[:8]
+
+
+@dataclass
+class WaveformHeader:
+    bits: int
+    sample_rate: int
+    block_size: int
+    total_samples: int
+    counts: list[int]
+
+    @property
+    def itemsize(self) -> int:
+        return self.bits // 8
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def data_start(self) -> int:
+        return HEADER.size + 4 * len(self.counts)
+
+    def level_offset(self, level: int) -> int:
+        return self.data_start + sum(self.counts[:level]) * 2 * self.itemsize
+
+    def choose_level(self, resolution: int) -> int:
+        """Самый грубый уровень, в котором пиков не меньше ``resolution``."""
+        for level in range(len(self.counts) - 1, -1, -1):
+            if self.counts[level] >= resolution:
+                return level
+        return 0
+
+
+class PeakAccumulator:
+    """Считает min/max по блокам, пока PCM (s16le) приходит кусками.
+
+    В памяти держатся только пики и неполный хвостовой блок, поэтому
+    длинные файлы не требуют декодированного сигнала целиком.
+    """
+
+    def __init__(self, block_size: int):
+        self.block_size = block_size
+        self.total_samples = 0
+        self._pending = b""
+        self._rest = np.empty(0, dtype=np.int16)
+        self._mins: list[np.ndarray] = []
+        self._maxs: list[np.ndarray] = []
+
+    def feed(self, data: bytes) -> None:
+        data = self._pending + data
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+        samples = np.frombuffer(data[:usable], dtype="<i2")
+        self.total_samples += len(samples)
+        if len(self._rest):
+            samples = np.concatenate([self._rest, samples])
+        full = len(samples) - len(samples) % self.block_size
+        if full:
+            blocks = samples[:full].reshape(-1, self.block_size)
+            self._mins.append(blocks.min(axis=1))
+            self._maxs.append(blocks.max(axis=1))
+        self._rest = samples[full:].copy()
+
+    def finish(self) -> Level:
+        if len(self._rest):
+            self._mins.append(self._rest.min(keepdims=True))
+            self._maxs.append(self._rest.max(keepdims=True))
+            self._rest = np.empty(0, dtype=np.int16)
+        if not self._mins:
+            empty = np.zeros(1, dtype=np.int16)
+            return empty, empty
+        return np.concatenate(self._mins), np.concatenate(self._maxs)
+
+
+def build_levels(base: Level, min_level_size: int) -> list[Level]:
+    levels = [base]
+    mins, maxs = base
+    while len(mins) > min_level_size and len(levels) < MAX_LEVELS:
+        if len(mins) % 2:
+            mins = np.append(mins, mins[-1])
+            maxs = np.append(maxs, maxs[-1])
+        mins = mins.reshape(-1, 2).min(axis=1)
+        maxs = maxs.reshape(-1, 2).max(axis=1)
+        levels.append((mins, maxs))
+    return levels
+
+
+def quantize(values: np.ndarray, bits: int) -> np.ndarray:
+    if bits == 8:
+        return (values >> 8).astype("<i1")
+    return values.astype("<i2")
+
+
+def encode_waveform(
+    levels: list[Level],
+    bits: int,
+    sample_rate: int,
+    block_size: int,
+    total_samples: int,
+) -> bytes:
+    if bits not in (8, 16):
+        raise ValueError(f"Unsupported peaks bit depth: {bits}")
+    parts = [
+        HEADER.pack(MAGIC, VERSION, bits, 0, sample_rate, block_size, total_samples, len(levels)),
+        struct.pack(f"<{len(levels)}I", *(len(mins) for mins, _ in levels)),
+    ]
+    for mins, maxs in levels:
+        parts.append(interleave(quantize(mins, bits), quantize(maxs, bits)).tobytes())
+    return b"".join(parts)
+
+
+def interleave(mins: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    pairs = np.empty(len(mins) * 2, dtype=mins.dtype)
+    pairs[0::2] = mins
+    pairs[1::2] = maxs
+    return pairs
+
+
+def parse_header(data: bytes) -> WaveformHeader:
+    magic, version, bits, _, sample_rate, block_size, total_samples, levels = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or levels > MAX_LEVELS:
+        raise ValueError("Unknown peaks file format")
+    counts = list(struct.unpack_from(f"<{levels}I", data, HEADER.size))
+    return WaveformHeader(bits, sample_rate, block_size, total_samples, counts)
+
+
+def resample_peaks(pairs: np.ndarray, resolution: int) -> np.ndarray:
+    """Сводит пары (min, max) ровно к ``resolution`` пар."""
+    count = len(pairs) // 2
+    if count <= resolution:
+        return pairs
+    starts = np.arange(resolution) * count // resolution
+    mins = np.minimum.reduceat(pairs[0::2], starts)
+    maxs = np.maximum.reduceat(pairs[1::2], starts)
+    return interleave(mins, maxs)
+
+
+async def read_peaks(
+    storage: StorageBackend, key: str, resolution: Optional[int] = None
+) -> tuple[WaveformHeader, np.ndarray]:
+    """Читает из хранилища заголовок и один уровень, подходящий для
+    ``resolution`` пиков, и сводит его к этому числу пиков."""
+    header = parse_header(await storage.read_range(key, 0, HEADER.size + 4 * MAX_LEVELS))
+    level = header.choose_level(resolution or header.counts[0])
+    count = header.counts[level]
+    data = await storage.read_range(key, header.level_offset(level), count * 2 * header.itemsize)
+    pairs = np.frombuffer(data, dtype="<i1" if header.bits == 8 else "<i2")
+    if resolution:
+        pairs = resample_peaks(pairs, resolution)
+    return header, pairs
@@ -4,7 +4,9 @@ from dataclasses import dataclass
 from uuid import uuid4
 
 import httpx
+from fastapi import HTTPException, status
 from httpx import HTTPStatusError
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -14,15 +16,28 @@ from src.conf import yandex_settings, YANDEX_REDIRECT_URI, YANDEX_TOKEN_URL, YAN
 from src.crud.user import crud_user
 from src.models import User
 from src.schemas.yandex import UserOAuthData, OAuthServices, UserCreateSocialSite
+from src.services.http_client import CircuitOpenError, ResilientHTTPClient
 
 HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
 
+yandex_http = ResilientHTTPClient(
+    connect_timeout=yandex_settings.YANDEX_HTTP_CONNECT_TIMEOUT,
+    read_timeout=yandex_settings.YANDEX_HTTP_READ_TIMEOUT,
+    pool_timeout=yandex_settings.YANDEX_HTTP_POOL_TIMEOUT,
+    max_connections=yandex_settings.YANDEX_HTTP_MAX_CONNECTIONS,
+    max_keepalive=yandex_settings.YANDEX_HTTP_MAX_KEEPALIVE,
+    retries=yandex_settings.YANDEX_HTTP_RETRIES,
+    retry_backoff=yandex_settings.YANDEX_HTTP_RETRY_BACKOFF,
+    failure_threshold=yandex_settings.YANDEX_CIRCUIT_FAILURES,
+    reset_timeout=yandex_settings.YANDEX_CIRCUIT_RESET,
+)
+
 
 
 
 
 async def get_oauth_user_token(
-    client: httpx.AsyncClient,
+    client: ResilientHTTPClient,
     token_url: str,
     data: Optional[dict] = None,
     params: Optional[dict] = None,
@@ -42,7 +57,7 @@ async def get_oauth_user_token(
     return response.json()
 
 async def get_oauth_user_data(
-    client: httpx.AsyncClient,
+    client: ResilientHTTPClient,
     params: dict,
     user_info_url: str,
     headers: Optional[dict] = None,
@@ -61,7 +76,10 @@ async def get_oauth_user_data(
     return response.json()
 
 
-async def get_yandex_oauth_data(code: str) -> UserOAuthData:
+async def get_yandex_oauth_data(
+    code: str, client: Optional[ResilientHTTPClient] = None
+) -> UserOAuthData:
+    client = client or yandex_http
     data = {
         "client_id": yandex_settings.YANDEX_APP_ID,
         "client_secret": yandex_settings.YANDEX_CLIENT_SECRET,
@@ -70,7 +88,7 @@ async def get_yandex_oauth_data(code: str) -> UserOAuthData:
         "grant_type": "authorization_code",
     }
 
-    async with httpx.AsyncClient() as client:
+    try:
         token_data = await get_oauth_user_token(
             client=client,
             data=data,
@@ -87,6 +105,24 @@ async def get_yandex_oauth_data(code: str) -> UserOAuthData:
             user_info_url=YANDEX_USER_INFO_URL,
             headers=headers,
         )
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Yandex OAuth is temporarily unavailable",
+            headers={"Retry-After": str(client.breaker.retry_after())},
+        )
+    except HTTPStatusError as ex:
+        if ex.response.status_code < 500:
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Yandex OAuth is temporarily unavailable",
+        ) from ex
+    except httpx.TransportError as ex:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Yandex OAuth is temporarily unavailable",
+        ) from ex
 
     return UserOAuthData(
         service_name=OAuthServices.yandex,
@@ -143,45 +179,22 @@ async def process_registration_and_login(
     user_data: UserOAuthData,
     schema_type: Type[UserCreateSocialSite],
 ) -> User:
-    service_name = user_data.service_name
-    service_id_field = f"{service_name}_id"
-    user_service_id = user_data.user_service_id
-
-    found_user_with_service_id = await crud_user.get_by_service_id(
-        db=db,
-        service_id_field=service_id_field,
-        user_service_id=user_service_id,
-    )
-    if found_user_with_service_id:
-        return found_user_with_service_id
-    new_user = await create_oauth_user(
-        db=db, user_data=user_data, schema_type=schema_type
-    )
-
-
-    return new_user
-
-
-async def create_oauth_user(
-    db: AsyncSession,
-    user_data: UserOAuthData,
-    schema_type: Type[UserCreateSocialSite],
-) -> User:
-    user_service_id = user_data.user_service_id
-    service_name = user_data.service_name
-    service_id_field = f"{service_name}_id"
-
-    uid = uuid4()
-    new_user_data = {
-        service_id_field: user_service_id,
-        "uid": uid,
+    service_id_field = f"{user_data.service_name}_id"
+    create_schema = schema_type(**{
+        service_id_field: user_data.user_service_id,
+        "uid": uuid4(),
         "email": user_data.email,
         "username": user_data.username,
-    }
-    new_user: User = await crud_user.create(
-        db=db, create_schema=schema_type(**new_user_data)
-    )
-    new_user.contact_emails = [user_data.email]
-    await db.commit()
-    await db.refresh(new_user)
-    return new_user
\ No newline at end of file
+    })
+    try:
+        return await crud_user.upsert_oauth_user(
+            db=db, service_id_field=service_id_field, create_schema=create_schema
+        )
+    except IntegrityError as ex:
+        # Конфликт по email с уже зарегистрированным пользователем.
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Email {user_data.email} is already "
+                   "associated with an account.",
+        ) from ex
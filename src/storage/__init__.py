@@ -0,0 +1,32 @@
+from functools import lru_cache
+from pathlib import Path
+
+from src.conf import audio_settings, storage_settings
+
+from .base import StorageBackend, StoredObject, content_key, shard_key
+from .local import LocalStorage
+
+__all__ = ["StorageBackend", "StoredObject", "LocalStorage", "content_key", "shard_key", "get_storage"]
+
+
+@lru_cache
+def get_storage() -> StorageBackend:
+    backend = storage_settings.STORAGE_BACKEND.lower()
+    if backend == "local":
+        return LocalStorage(
+            root=Path(audio_settings.AUDIO_UPLOAD_DIR),
+            chunk_size=audio_settings.AUDIO_UPLOAD_CHUNK_SIZE,
+        )
+    if backend == "s3":
+        from .s3 import S3Storage
+
+        return S3Storage(
+            bucket=storage_settings.S3_BUCKET,
+            chunk_size=audio_settings.AUDIO_UPLOAD_CHUNK_SIZE,
+            endpoint_url=storage_settings.S3_ENDPOINT_URL,
+            region_name=storage_settings.S3_REGION,
+            access_key_id=storage_settings.S3_ACCESS_KEY_ID,
+            secret_access_key=storage_settings.S3_SECRET_ACCESS_KEY,
+            part_size=storage_settings.S3_PART_SIZE,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
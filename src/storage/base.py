@@ -0,0 +1,71 @@
+import hashlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class StoredObject:
+    key: str
+    size: int
+    mtime: float
+    etag: str
+
+
+def content_key(digest: str) -> str:
+    """Ключ вида ``ab/cd/<hash>``: файлы равномерно распределяются
+    по каталогам (или префиксам бакета)."""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}"
+
+
+def shard_key(name: str) -> str:
+    return content_key(hashlib.sha256(name.encode()).hexdigest())
+
+
+class StorageBackend(ABC):
+    @abstractmethod
+    async def put(self, key: str, chunks: AsyncIterator[bytes]) -> StoredObject:
+        """Сохраняет поток под ключом ``key``. Объект появляется атомарно:
+        при ошибке в потоке частично записанные данные удаляются."""
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def stream(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Читает байты ``start..end`` (включительно) кусками."""
+
+    async def read_range(self, key: str, offset: int, size: int) -> bytes:
+        if size <= 0:
+            return b""
+        data = bytearray()
+        async for chunk in self.stream(key, offset, offset + size - 1):
+            data.extend(chunk)
+        return bytes(data)
+
+    @abstractmethod
+    async def move(self, src_key: str, dst_key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        ...
+
+    @abstractmethod
+    async def list_objects(self, prefix: str) -> list[StoredObject]:
+        """Объекты, ключи которых начинаются с ``prefix``."""
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Путь к файлу на диске, если объект хранится локально."""
+        return None
+
+    async def close(self) -> None:
+        pass
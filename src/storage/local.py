@@ -0,0 +1,119 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import IO, AsyncIterator, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from .base import StorageBackend, StoredObject
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: Path, chunk_size: int):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+
+    def local_path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Storage key escapes storage root: {key}")
+        return path
+
+    async def put(self, key: str, chunks: AsyncIterator[bytes]) -> StoredObject:
+        destination = self.local_path(key)
+        await run_in_threadpool(destination.parent.mkdir, parents=True, exist_ok=True)
+        tmp = await run_in_threadpool(
+            tempfile.NamedTemporaryFile,
+            dir=destination.parent,
+            prefix=".upload-",
+            delete=False,
+        )
+        try:
+            async for chunk in chunks:
+                await run_in_threadpool(tmp.write, chunk)
+            await run_in_threadpool(self._commit_file, tmp, destination)
+        except BaseException:
+            await run_in_threadpool(self._discard_file, tmp)
+            raise
+        return await self.stat(key)
+
+    async def get(self, key: str) -> bytes:
+        return await run_in_threadpool(self.local_path(key).read_bytes)
+
+    async def stream(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        file = await run_in_threadpool(open, self.local_path(key), "rb")
+        try:
+            await run_in_threadpool(file.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await run_in_threadpool(file.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(file.close)
+
+    async def move(self, src_key: str, dst_key: str) -> None:
+        destination = self.local_path(dst_key)
+        await run_in_threadpool(destination.parent.mkdir, parents=True, exist_ok=True)
+        await run_in_threadpool(os.replace, self.local_path(src_key), destination)
+
+    async def delete(self, key: str) -> None:
+        await run_in_threadpool(self.local_path(key).unlink, missing_ok=True)
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat_result = await run_in_threadpool(os.stat, self.local_path(key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(
+            key=key,
+            size=stat_result.st_size,
+            mtime=stat_result.st_mtime,
+            etag=f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+        )
+
+    async def list_objects(self, prefix: str) -> list[StoredObject]:
+        return await run_in_threadpool(self._list_objects, prefix)
+
+    def _list_objects(self, prefix: str) -> list[StoredObject]:
+        root = self.root.resolve()
+        directory = self.local_path(prefix.rpartition("/")[0])
+        if not directory.is_dir():
+            return []
+        objects = []
+        for path in directory.rglob("*"):
+            key = path.relative_to(root).as_posix()
+            # .upload-* — недописанные файлы put.
+            if path.name.startswith(".upload-") or not key.startswith(prefix):
+                continue
+            try:
+                stat_result = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file():
+                objects.append(StoredObject(
+                    key=key,
+                    size=stat_result.st_size,
+                    mtime=stat_result.st_mtime,
+                    etag=f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+                ))
+        return objects
+
+    @staticmethod
+    def _commit_file(tmp: IO[bytes], destination: Path) -> None:
+        tmp.flush()
+        os.fsync(tmp.fileno())
+        tmp.close()
+        os.chmod(tmp.name, 0o644)
+        os.replace(tmp.name, destination)
+
+    @staticmethod
+    def _discard_file(tmp: IO[bytes]) -> None:
+        tmp.close()
+        Path(tmp.name).unlink(missing_ok=True)
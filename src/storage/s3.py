@@ -0,0 +1,150 @@
+from typing import Any, AsyncIterator, Optional
+
+from .base import StorageBackend, StoredObject
+
+MIN_PART_SIZE = 5 * 1024 * 1024  # минимальный размер части multipart upload в S3
+
+
+class S3Storage(StorageBackend):
+    """Хранилище в S3-совместимом сервисе (AWS S3, MinIO и т.п.).
+
+    Требует пакет ``aiobotocore``.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        chunk_size: int,
+        endpoint_url: Optional[str] = None,
+        region_name: Optional[str] = None,
+        access_key_id: Optional[str] = None,
+        secret_access_key: Optional[str] = None,
+        part_size: int = 8 * 1024 * 1024,
+    ):
+        from aiobotocore.session import get_session
+
+        self.bucket = bucket
+        self.chunk_size = chunk_size
+        self.part_size = max(part_size, MIN_PART_SIZE)
+        self._session = get_session()
+        self._client_options = {
+            "endpoint_url": endpoint_url or None,
+            "region_name": region_name or None,
+            "aws_access_key_id": access_key_id or None,
+            "aws_secret_access_key": secret_access_key or None,
+        }
+        self._client_context = None
+        self._client = None
+
+    async def client(self) -> Any:
+        if self._client is None:
+            self._client_context = self._session.create_client("s3", **self._client_options)
+            self._client = await self._client_context.__aenter__()
+        return self._client
+
+    async def close(self) -> None:
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+            self._client_context = None
+            self._client = None
+
+    async def put(self, key: str, chunks: AsyncIterator[bytes]) -> StoredObject:
+        client = await self.client()
+        buffer = bytearray()
+        upload_id = None
+        parts = []
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                if len(buffer) < self.part_size:
+                    continue
+                if upload_id is None:
+                    response = await client.create_multipart_upload(Bucket=self.bucket, Key=key)
+                    upload_id = response["UploadId"]
+                parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, bytes(buffer)))
+                buffer.clear()
+
+            if upload_id is None:
+                await client.put_object(Bucket=self.bucket, Key=key, Body=bytes(buffer))
+            else:
+                if buffer:
+                    parts.append(await self._upload_part(client, key, upload_id, len(parts) + 1, bytes(buffer)))
+                await client.complete_multipart_upload(
+                    Bucket=self.bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        except BaseException:
+            if upload_id is not None:
+                await client.abort_multipart_upload(Bucket=self.bucket, Key=key, UploadId=upload_id)
+            raise
+        return await self.stat(key)
+
+    async def _upload_part(
+        self, client: Any, key: str, upload_id: str, number: int, body: bytes
+    ) -> dict:
+        response = await client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id, PartNumber=number, Body=body
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
+    async def get(self, key: str) -> bytes:
+        client = await self.client()
+        response = await client.get_object(Bucket=self.bucket, Key=key)
+        async with response["Body"] as body:
+            return await body.read()
+
+    async def stream(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        client = await self.client()
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = await client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)
+        async with response["Body"] as body:
+            while chunk := await body.read(self.chunk_size):
+                yield chunk
+
+    async def move(self, src_key: str, dst_key: str) -> None:
+        client = await self.client()
+        await client.copy_object(
+            Bucket=self.bucket,
+            Key=dst_key,
+            CopySource={"Bucket": self.bucket, "Key": src_key},
+        )
+        await client.delete_object(Bucket=self.bucket, Key=src_key)
+
+    async def delete(self, key: str) -> None:
+        client = await self.client()
+        await client.delete_object(Bucket=self.bucket, Key=key)
+
+    async def list_objects(self, prefix: str) -> list[StoredObject]:
+        client = await self.client()
+        paginator = client.get_paginator("list_objects_v2")
+        objects = []
+        async for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                objects.append(StoredObject(
+                    key=item["Key"],
+                    size=item["Size"],
+                    mtime=item["LastModified"].timestamp(),
+                    etag=item["ETag"],
+                ))
+        return objects
+
+    async def stat(self, key: str) -> Optional[StoredObject]:
+        from botocore.exceptions import ClientError
+
+        client = await self.client()
+        try:
+            response = await client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as ex:
+            if ex.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(
+            key=key,
+            size=response["ContentLength"],
+            mtime=response["LastModified"].timestamp(),
+            etag=response["ETag"],
+        )
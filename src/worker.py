@@ -0,0 +1,73 @@
+"""Точка входа воркеров фоновых задач.
+
+    python -m src.worker [--processes N] [--concurrency M]
+
+Запускает N процессов (по умолчанию — по числу ядер), в каждом свой event
+loop и свой пул соединений с БД. Процессы независимо забирают задачи из
+таблицы ``job`` через ``SKIP LOCKED``, поэтому воркеров можно запускать
+сколько угодно и на разных машинах.
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+
+from src.conf import job_settings
+
+
+async def serve(concurrency: int) -> None:
+    import src.services.audio_tasks  # noqa: F401 — регистрирует обработчики
+    from src.services.jobs import JobWorker
+    from src.storage import get_storage
+
+    worker = JobWorker(concurrency=concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        await get_storage().close()
+
+
+def run_process(concurrency: int) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(process)d %(levelname)s %(name)s: %(message)s")
+    asyncio.run(serve(concurrency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Воркеры фоновых задач")
+    parser.add_argument("--processes", type=int, default=job_settings.JOB_WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=job_settings.JOB_WORKER_CONCURRENCY)
+    args = parser.parse_args()
+
+    processes = args.processes or os.cpu_count() or 1
+    if processes == 1:
+        run_process(args.concurrency)
+        return
+
+    # spawn: каждый процесс создаёт свой движок БД и event loop с нуля,
+    # а не наследует открытые соединения родителя.
+    context = multiprocessing.get_context("spawn")
+    children = [
+        context.Process(target=run_process, args=(args.concurrency,), name=f"job-worker-{i}")
+        for i in range(processes)
+    ]
+    for child in children:
+        child.start()
+
+    def forward(signum, frame):
+        for child in children:
+            if child.is_alive():
+                os.kill(child.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for child in children:
+        child.join()
+
+
+if __name__ == "__main__":
+    main()